@@ -8,15 +8,72 @@ Usage:
     # Build index
     python -m rag.indexer
 
+    # Build one shard of a sharded index (see config.SHARDS)
+    python -m rag.indexer --shard NAME
+
     # Query
     python -m rag.query "How does authentication work?"
 
+    # Keep the index warm for fast repeated CLI queries
+    python -m rag serve
+
     # Programmatic
     from rag.query import query_docs
     results = query_docs("deployment procedure", top_k=5)
+
+    # Provisional lexical results first, then the final ranking
+    from rag import iter_query_docs
+    for update in iter_query_docs("deployment procedure"):
+        print(update["stage"], len(update["results"]))
+
+    # From asyncio code (runs off the event loop; cancellable)
+    from rag import aquery_docs
+    results = await aquery_docs("deployment procedure", top_k=5)
+
+    # query_docs reuses one retriever per process; force a reload with
+    from rag import reset
+    reset()
+
+    # See where a short-lived query spends its startup time
+    python -m rag.query "deployment procedure" --startup-timings
+
+    # ...and where each query stage spends its time (p50/p95/p99)
+    python -m rag.query "deployment procedure" --timings
+
+    # cProfile the index load, model load and query (or a build) separately
+    python -m rag.query "deployment procedure" --profile
+    python -m rag.indexer --force --profile
+
+Importing the package is cheap: the names below are resolved on first
+access, and sentence-transformers is imported only when a query first
+needs the embedding model.
 """
+from importlib import import_module
+
+from . import startup
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "query_docs": "query",
+    "aquery_docs": "query",
+    "iter_query_docs": "query",
+    "get_section": "query",
+    "get_retriever": "query",
+    "reset": "query",
+    "RAGRetriever": "retriever",
+    "ShardedRetriever": "shards",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
 
-from .query import query_docs
-from .retriever import RAGRetriever
 
-__all__ = ["query_docs", "RAGRetriever"]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,7 +1,10 @@
-"""Module entry point for python -m rag.indexer and python -m rag.query."""
+"""Module entry point for python -m rag.indexer, python -m rag.query and python -m rag serve."""
 import sys
 
-if len(sys.argv) > 1 and sys.argv[0].endswith("indexer"):
+if len(sys.argv) > 1 and sys.argv[1] == "serve":
+    from .server import main
+    main(sys.argv[2:])
+elif len(sys.argv) > 1 and sys.argv[0].endswith("indexer"):
     from .indexer import main
     main()
 elif len(sys.argv) > 1 and sys.argv[0].endswith("query"):
@@ -9,6 +12,10 @@ elif len(sys.argv) > 1 and sys.argv[0].endswith("query"):
     main()
 else:
     print("Usage:")
-    print("  python -m rag.indexer [--force]")
-    print("  python -m rag.query '<query>' [--top N] [--json]")
+    print("  python -m rag.indexer [--force] [--shard NAME] [--profile]")
+    print("  python -m rag.query '<query>' [--top N] [--json] [--no-daemon] [--startup-timings] [--timings] [--profile]")
+    print("  python -m rag serve [--host HOST] [--port PORT] [--workers N]")
+    print("  python -m rag.bench throughput [--threads 1 2 4 8]")
+    print("  python -m rag.bench synthetic [--chunks 1000 10000] [--output FILE]")
+    print("  python -m rag.eval [--gold FILE] [--top N] [--json]")
     sys.exit(1)
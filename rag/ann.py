@@ -0,0 +1,162 @@
+"""Approximate nearest-neighbour search for large corpora (IVF, NumPy only).
+
+An inverted-file (IVF) index clusters the normalized chunk embeddings with
+spherical k-means. A query is compared against the centroids and only the
+chunks in the `nprobe` closest clusters are scored, instead of the whole
+corpus. Raising ANN_NPROBE trades latency for recall; nprobe == n_lists is
+exact search.
+
+Built by rag.indexer when the corpus has at least ANN_MIN_CHUNKS chunks and
+persisted next to embeddings.npy (see arrays.py).
+"""
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from . import config
+from .arrays import save_arrays, load_arrays, load_meta
+
+ANN_INDEX_VERSION = 1
+_ASSIGN_BATCH = 8192
+
+
+def _assign(embeddings, centroids):
+    """Index of the most similar centroid for each row (batched)."""
+    assignments = np.empty(len(embeddings), dtype=np.int32)
+    for start in range(0, len(embeddings), _ASSIGN_BATCH):
+        block = np.asarray(embeddings[start:start + _ASSIGN_BATCH], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(embeddings, n_clusters: int, n_iter: int, seed: int = 0):
+    """Cluster unit vectors by cosine similarity; returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    data = np.asarray(embeddings, dtype=np.float32)
+    centroids = data[rng.choice(len(data), n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = _assign(data, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_clusters)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+
+        sums = np.add.reduceat(data[order], starts, axis=0)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids[nonempty] = sums / np.maximum(norms, 1e-12)
+
+        # Re-seed empty clusters with random points
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+
+    return centroids
+
+
+class IVFIndex:
+    """
+    Centroids plus CSR cluster lists.
+
+    Chunks in cluster c are list_ids[list_ptr[c]:list_ptr[c + 1]].
+    """
+
+    def __init__(self, centroids, list_ptr, list_ids):
+        self.centroids = centroids
+        self.list_ptr = list_ptr
+        self.list_ids = list_ids
+        self.n_lists = len(centroids)
+
+    @classmethod
+    def build(
+        cls,
+        embeddings,
+        n_lists: Optional[int] = None,
+        n_iter: int = config.ANN_KMEANS_ITERATIONS,
+        train_size: int = config.ANN_TRAIN_SIZE,
+        seed: int = 0
+    ) -> "IVFIndex":
+        """Train centroids on a sample of embeddings and assign every chunk."""
+        n = len(embeddings)
+        if n_lists is None:
+            n_lists = max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+
+        rng = np.random.default_rng(seed)
+        if n > train_size:
+            sample = np.sort(rng.choice(n, train_size, replace=False))
+            training = np.asarray(embeddings[sample], dtype=np.float32)
+        else:
+            training = np.asarray(embeddings, dtype=np.float32)
+
+        centroids = spherical_kmeans(training, n_lists, n_iter, seed)
+        assignments = _assign(embeddings, centroids)
+
+        list_ids = np.argsort(assignments, kind="stable").astype(np.int32)
+        list_ptr = np.zeros(n_lists + 1, dtype=np.int64)
+        list_ptr[1:] = np.cumsum(np.bincount(assignments, minlength=n_lists))
+        return cls(centroids, list_ptr, list_ids)
+
+    def save(self, directory: Path, generation: Optional[str] = None):
+        """Persist the index, tagged with the generation of the build it belongs to."""
+        save_arrays(
+            directory,
+            {
+                "centroids": self.centroids,
+                "list_ptr": self.list_ptr,
+                "list_ids": self.list_ids,
+            },
+            {
+                "version": ANN_INDEX_VERSION,
+                "n_lists": self.n_lists,
+                "num_chunks": int(len(self.list_ids)),
+                "dim": int(self.centroids.shape[1]),
+                "generation": generation,
+            }
+        )
+
+    @classmethod
+    def load(
+        cls,
+        directory: Path,
+        expected_chunks: int,
+        dim: int,
+        generation: Optional[str] = None
+    ) -> Optional["IVFIndex"]:
+        """
+        Load a persisted index, or None if missing or built for another corpus.
+
+        Args:
+            directory: ANN index directory
+            expected_chunks: Chunks in the loaded index
+            dim: Embedding dimension
+            generation: Manifest generation of the loaded index; an ANN index
+                saved by another build is rejected even if its shape matches
+        """
+        meta = load_meta(directory)
+        if meta is None:
+            return None
+        if (meta.get("version") != ANN_INDEX_VERSION
+                or meta.get("num_chunks") != expected_chunks
+                or meta.get("dim") != dim
+                or meta.get("generation") != generation):
+            return None
+
+        arrays, _ = load_arrays(directory, ("centroids", "list_ptr", "list_ids"))
+        return cls(arrays["centroids"], arrays["list_ptr"], arrays["list_ids"])
+
+    def search(self, query_embedding, nprobe: int = config.ANN_NPROBE):
+        """Sorted chunk indices in the nprobe clusters closest to the query."""
+        nprobe = max(1, min(nprobe, self.n_lists))
+        similarities = self.centroids @ np.asarray(query_embedding, dtype=np.float32)
+        if nprobe < self.n_lists:
+            probe = np.argpartition(-similarities, nprobe - 1)[:nprobe]
+        else:
+            probe = np.arange(self.n_lists)
+
+        ids = np.concatenate([
+            self.list_ids[self.list_ptr[c]:self.list_ptr[c + 1]] for c in probe
+        ])
+        ids.sort()
+        return ids
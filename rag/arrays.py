@@ -0,0 +1,67 @@
+"""Directories of memory-mappable NumPy arrays plus a JSON header.
+
+Used for the precomputed index structures written next to embeddings.npy.
+Each array is stored as <name>.npy (mappable with np.load(mmap_mode="r"))
+and the scalar parameters go in meta.json, which is written last so a
+half-written directory is never mistaken for a complete one.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+META_FILE = "meta.json"
+
+
+def save_arrays(directory: Path, arrays: Dict[str, Any], meta: Dict[str, Any]):
+    """Write arrays and meta to directory (each file renamed into place)."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    for name, array in arrays.items():
+        path = directory / f"{name}.npy"
+        tmp_path = directory / f"{name}.npy.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+
+    meta_path = directory / META_FILE
+    tmp_meta = directory / f"{META_FILE}.tmp"
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_meta, meta_path)
+
+
+def load_meta(directory: Path) -> Optional[Dict[str, Any]]:
+    """Read meta.json, or None if the directory was never written."""
+    meta_path = Path(directory) / META_FILE
+    if not meta_path.exists():
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_arrays(
+    directory: Path,
+    names,
+    mmap: bool = True
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Load named arrays and meta from directory.
+
+    Raises:
+        FileNotFoundError: If meta.json or any array is missing
+    """
+    directory = Path(directory)
+    meta = load_meta(directory)
+    if meta is None:
+        raise FileNotFoundError(f"{directory / META_FILE} not found")
+
+    mmap_mode = "r" if mmap else None
+    arrays = {
+        name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)
+        for name in names
+    }
+    return arrays, meta
@@ -0,0 +1,486 @@
+"""Benchmarks for the RAG retriever.
+
+Usage:
+    # Queries/second and p50/p99 latency with 1, 2, 4 and 8 query threads
+    python -m rag.bench throughput
+    python -m rag.bench throughput --threads 1 4 16 --rounds 5 --json
+
+    # Index and query timings on generated corpora (JSON, hermetic)
+    python -m rag.bench synthetic --chunks 1000 10000 --output bench.json
+
+The throughput run first answers every query single-threaded as a
+reference, then replays the workload from a thread pool against the same
+shared retriever and counts any result that differs from the reference.
+The result cache is off unless --result-cache is given, so every timed
+query runs the pipeline.
+
+The synthetic run works in a temporary directory on a corpus from
+rag.synthetic, using the hashing embedding backend by default so no model
+is downloaded. It times chunk_markdown_file over the corpus, build_index,
+the retriever load, and query() on each pipeline path: structured lookup
+(Quick Reference and canonical), precision-filtered search, broad search
+(ANN when the corpus is large enough), empty queries, and result cache
+hits. Compare the JSON of successive runs to spot regressions.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from . import config
+from .cache import LRUCache
+
+DEFAULT_SYNTHETIC_CHUNKS = [1000]
+
+# Settings run_synthetic() changes for its runs and restores afterwards
+_SYNTHETIC_SETTINGS = (
+    "EMBEDDING_BACKEND",
+    "ENABLE_RESULT_CACHE",
+    "ENABLE_QUERY_EMBEDDING_DISK_CACHE",
+    "ENABLE_QUERY_TIMINGS",
+)
+
+DEFAULT_THREADS = [1, 2, 4, 8]
+
+
+def default_queries(retriever, limit: int = 64) -> List[str]:
+    """
+    Build a workload from the index itself.
+
+    Quick Reference questions first, then distinct chunk headings spread
+    evenly over the corpus (deterministic for a given index).
+    """
+    queries = [question for question, _ in (getattr(retriever, "qr_entries", None) or [])]
+
+    headings = list(dict.fromkeys(
+        chunk.get("heading_text", "") for chunk in retriever.chunks
+        if chunk.get("heading_text") and chunk.get("heading_text") != "Header"
+    ))
+    remaining = max(0, limit - len(queries))
+    if headings and remaining:
+        step = max(1, len(headings) // remaining)
+        queries.extend(headings[::step][:remaining])
+
+    return queries[:limit]
+
+
+def _fingerprint(results: List[Dict[str, Any]]):
+    return [(r["section_reference"], r["final_score"]) for r in results]
+
+
+def run_throughput(
+    retriever,
+    queries: List[str],
+    threads: List[int] = DEFAULT_THREADS,
+    rounds: int = 3,
+    top_k: int = config.DEFAULT_TOP_K
+) -> List[Dict[str, Any]]:
+    """
+    Measure concurrent query throughput on one shared retriever.
+
+    Args:
+        retriever: RAGRetriever or ShardedRetriever
+        queries: Query texts (the workload is queries * rounds)
+        threads: Thread counts to measure
+        rounds: Times each query is repeated per measurement
+        top_k: Results per query
+
+    Returns:
+        One row per thread count: qps, p50/p99 latency (ms), mismatches
+    """
+    # Single-threaded reference; also loads the model and warms caches
+    reference = {q: _fingerprint(retriever.query(q, top_k)) for q in queries}
+    workload = queries * rounds
+
+    def timed_query(query_text):
+        start = time.perf_counter()
+        results = retriever.query(query_text, top_k)
+        elapsed = time.perf_counter() - start
+        return elapsed, _fingerprint(results) == reference[query_text]
+
+    rows = []
+    for n_threads in threads:
+        with ThreadPoolExecutor(max_workers=n_threads) as pool:
+            start = time.perf_counter()
+            outcomes = list(pool.map(timed_query, workload))
+            wall = time.perf_counter() - start
+
+        latencies = np.array([elapsed for elapsed, _ in outcomes]) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99])
+        rows.append({
+            "threads": n_threads,
+            "queries": len(workload),
+            "seconds": round(wall, 3),
+            "qps": round(len(workload) / wall, 1),
+            "p50_ms": round(float(p50), 2),
+            "p99_ms": round(float(p99), 2),
+            "mismatches": sum(1 for _, ok in outcomes if not ok),
+        })
+
+    return rows
+
+
+def print_throughput(rows: List[Dict[str, Any]]):
+    """Print throughput rows as a table."""
+    print(f"\n{'threads':>7}  {'queries':>7}  {'qps':>8}  {'p50 ms':>8}  {'p99 ms':>8}  mismatches")
+    for row in rows:
+        print(
+            f"{row['threads']:>7}  {row['queries']:>7}  {row['qps']:>8.1f}  "
+            f"{row['p50_ms']:>8.2f}  {row['p99_ms']:>8.2f}  {row['mismatches']}"
+        )
+
+
+def disable_embedding_cache(retriever):
+    """Make every query encode (measures model throughput, not cache hits)."""
+    uncached = LRUCache(maxsize=0)
+    retriever.embedding_cache = uncached
+    for shard in getattr(retriever, "shards", {}).values():
+        shard.embedding_cache = uncached
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 and mean of query durations in seconds, in milliseconds."""
+    latencies = np.array(seconds) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+    }
+
+
+def _time_query_path(
+    retriever, queries: List[str], rounds: int, top_k: int,
+    enable_precision_filter: bool = True
+) -> Dict[str, Any]:
+    """Latency of one pipeline path, the lookup method taken, and stage timings."""
+    retriever.query_timings.reset()
+    seconds = []
+    lookups: Counter = Counter()
+    for round_number in range(rounds):
+        for query_text in queries:
+            start = time.perf_counter()
+            results = retriever.query(
+                query_text, top_k, enable_precision_filter=enable_precision_filter
+            )
+            seconds.append(time.perf_counter() - start)
+            if round_number == 0 and results:
+                lookups[results[0].get("lookup_method", "search")] += 1
+
+    return {
+        "queries": len(seconds),
+        **latency_summary(seconds),
+        "lookup": dict(lookups),
+        "stages": retriever.stats(),
+    }
+
+
+def _synthetic_run(
+    target_chunks: int, queries_per_path: int, rounds: int,
+    sections_per_file: int, seed: int, top_k: int
+) -> Dict[str, Any]:
+    """Generate, index, load and query one corpus in the current directory."""
+    from .chunker import chunk_markdown_file
+    from .indexer import build_index
+    from .retriever import RAGRetriever
+    from .synthetic import generate_corpus
+
+    run: Dict[str, Any] = {"target_chunks": target_chunks}
+
+    start = time.perf_counter()
+    corpus = generate_corpus(Path.cwd(), target_chunks, sections_per_file, seed)
+    run["generate_seconds"] = round(time.perf_counter() - start, 3)
+    run["files"] = len(corpus["files"])
+
+    start = time.perf_counter()
+    n_chunks = sum(len(chunk_markdown_file(Path(path), {})) for path in corpus["files"])
+    elapsed = time.perf_counter() - start
+    run["chunk_markdown_file"] = {
+        "seconds": round(elapsed, 3),
+        "chunks": n_chunks,
+        "us_per_chunk": round(elapsed / max(n_chunks, 1) * 1e6, 1),
+    }
+
+    # Build and load progress goes to stderr, keeping stdout for the JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        start = time.perf_counter()
+        stats = build_index(force_rebuild=True)
+        run["build_index"] = {
+            "seconds": round(time.perf_counter() - start, 3),
+            "chunks": stats["chunks_created"],
+        }
+
+        start = time.perf_counter()
+        retriever = RAGRetriever()
+        run["load_seconds"] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        retriever.model
+        run["load_model_seconds"] = round(time.perf_counter() - start, 3)
+
+    run["ann"] = retriever.ann_index is not None
+    disable_embedding_cache(retriever)
+    retriever.result_cache = None
+
+    rng = random.Random(seed)
+    headings = rng.sample(corpus["headings"], min(queries_per_path, len(corpus["headings"])))
+    search_queries = [heading.lower() for heading in headings]
+    paths = {
+        "structured_quick_reference": (corpus["qr_questions"][:queries_per_path], True),
+        "structured_canonical": (
+            [f"{concept} overview" for concept in corpus["canonical_concepts"][:queries_per_path]],
+            True
+        ),
+        "precision": (search_queries, True),
+        "broad": (search_queries, False),
+        "empty": ([""], True),
+    }
+    run["queries"] = {
+        name: _time_query_path(retriever, queries, rounds, top_k, enable_precision_filter)
+        for name, (queries, enable_precision_filter) in paths.items()
+    }
+
+    # Result cache hits (in memory; warmed before timing)
+    retriever.result_cache = LRUCache(maxsize=max(len(search_queries), 1))
+    for query_text in search_queries:
+        retriever.query(query_text, top_k)
+    run["queries"]["result_cache"] = _time_query_path(retriever, search_queries, rounds, top_k)
+
+    return run
+
+
+def run_synthetic(
+    sizes: List[int] = DEFAULT_SYNTHETIC_CHUNKS,
+    queries_per_path: int = 20,
+    rounds: int = 3,
+    sections_per_file: int = 12,
+    seed: int = 0,
+    top_k: int = config.DEFAULT_TOP_K,
+    backend: str = "hashing"
+) -> Dict[str, Any]:
+    """
+    Benchmark indexing and querying on synthetic corpora.
+
+    Each size runs in its own temporary directory (the working directory is
+    changed for the run and restored afterwards). Embedding and result disk
+    caches are off, the query embedding cache is bypassed, and query
+    timings are on, so every timed query runs its whole path.
+
+    Args:
+        sizes: Approximate corpus sizes in chunks
+        queries_per_path: Distinct queries per pipeline path
+        rounds: Times each query is repeated
+        sections_per_file: H2/H3 sections per generated file
+        seed: Corpus and query sampling seed
+        top_k: Results per query
+        backend: Embedding backend (default "hashing": no model download)
+
+    Returns:
+        {"environment": {...}, "runs": [one dict per size]}
+    """
+    from .encoders import encoder_identity
+
+    saved = {name: getattr(config, name) for name in _SYNTHETIC_SETTINGS}
+    original_cwd = os.getcwd()
+    config.EMBEDDING_BACKEND = backend
+    config.ENABLE_RESULT_CACHE = False
+    config.ENABLE_QUERY_EMBEDDING_DISK_CACHE = False
+    config.ENABLE_QUERY_TIMINGS = True
+
+    try:
+        report: Dict[str, Any] = {
+            "environment": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "encoder": encoder_identity(),
+                "sections_per_file": sections_per_file,
+                "queries_per_path": queries_per_path,
+                "rounds": rounds,
+                "top_k": top_k,
+                "seed": seed,
+            },
+            "runs": [],
+        }
+        for target_chunks in sizes:
+            with tempfile.TemporaryDirectory(prefix="rag-bench-") as directory:
+                os.chdir(directory)
+                try:
+                    report["runs"].append(_synthetic_run(
+                        target_chunks, queries_per_path, rounds,
+                        sections_per_file, seed, top_k
+                    ))
+                finally:
+                    os.chdir(original_cwd)
+        return report
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+
+
+def _load_queries(path: Optional[Path], retriever, limit: int) -> List[str]:
+    if path is None:
+        return default_queries(retriever, limit)
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()][:limit]
+
+
+def main(argv=None):
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m rag.bench",
+        description="Benchmark the RAG retriever"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    throughput = subparsers.add_parser(
+        "throughput",
+        help="Concurrent query throughput and latency on one shared retriever"
+    )
+    throughput.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        default=DEFAULT_THREADS,
+        help="Thread counts to measure (default: 1 2 4 8)"
+    )
+    throughput.add_argument(
+        "--queries",
+        type=Path,
+        help="File with one query per line (default: QR questions + chunk headings)"
+    )
+    throughput.add_argument(
+        "--limit",
+        type=int,
+        default=64,
+        help="Maximum distinct queries (default: 64)"
+    )
+    throughput.add_argument(
+        "--rounds",
+        type=int,
+        default=3,
+        help="Repetitions of the query set per thread count (default: 3)"
+    )
+    throughput.add_argument(
+        "--top",
+        type=int,
+        default=config.DEFAULT_TOP_K,
+        help=f"Results per query (default: {config.DEFAULT_TOP_K})"
+    )
+    throughput.add_argument(
+        "--no-embedding-cache",
+        action="store_true",
+        help="Encode every query instead of reusing cached query embeddings"
+    )
+    throughput.add_argument(
+        "--result-cache",
+        action="store_true",
+        help="Keep the query result cache on (measures cache hits, not the pipeline)"
+    )
+    throughput.add_argument(
+        "--json",
+        action="store_true",
+        help="Output as JSON"
+    )
+
+    synthetic = subparsers.add_parser(
+        "synthetic",
+        help="Index and query timings on generated corpora (JSON)"
+    )
+    synthetic.add_argument(
+        "--chunks",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SYNTHETIC_CHUNKS,
+        help="Corpus sizes in chunks, e.g. 1000 10000 100000 (default: 1000)"
+    )
+    synthetic.add_argument(
+        "--queries",
+        type=int,
+        default=20,
+        help="Distinct queries per pipeline path (default: 20)"
+    )
+    synthetic.add_argument(
+        "--rounds",
+        type=int,
+        default=3,
+        help="Repetitions of each query (default: 3)"
+    )
+    synthetic.add_argument(
+        "--sections-per-file",
+        type=int,
+        default=12,
+        help="H2/H3 sections per generated file (default: 12)"
+    )
+    synthetic.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Corpus seed (default: 0)"
+    )
+    synthetic.add_argument(
+        "--top",
+        type=int,
+        default=config.DEFAULT_TOP_K,
+        help=f"Results per query (default: {config.DEFAULT_TOP_K})"
+    )
+    synthetic.add_argument(
+        "--backend",
+        default="hashing",
+        help="Embedding backend (default: hashing, which needs no model)"
+    )
+    synthetic.add_argument(
+        "--output",
+        type=Path,
+        help="Write the JSON report to this file instead of stdout"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "synthetic":
+        report = run_synthetic(
+            args.chunks, args.queries, args.rounds,
+            args.sections_per_file, args.seed, args.top, args.backend
+        )
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Wrote {args.output}")
+        else:
+            print(json.dumps(report, indent=2))
+        return
+
+    from .query import get_retriever
+    retriever = get_retriever()
+    if not args.result_cache:
+        # Otherwise every round after the reference is a cache hit
+        retriever.result_cache = None
+    if args.no_embedding_cache:
+        disable_embedding_cache(retriever)
+
+    queries = _load_queries(args.queries, retriever, args.limit)
+    if not queries:
+        print("Error: No queries to run")
+        sys.exit(1)
+
+    rows = run_throughput(retriever, queries, args.threads, args.rounds, args.top)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"\n{len(queries)} distinct queries x {args.rounds} rounds, top_k={args.top}")
+        print_throughput(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Precomputed Okapi BM25 index.
+
+The indexer tokenizes the corpus once and stores the term dictionary,
+IDF values, document lengths and postings as arrays (see arrays.py). The
+retriever loads them in milliseconds instead of re-tokenizing every chunk
+on startup.
+
+Scores match rank_bm25.BM25Okapi for the same corpus and parameters, but
+candidate subsets can be scored without touching the rest of the corpus,
+and rank_bm25 is not required.
+"""
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from . import config
+from .arrays import save_arrays, load_arrays, load_meta
+
+# Bump TOKENIZER_VERSION whenever tokenize() changes. Persisted indexes
+# built with a different version (or pattern) are rejected at load.
+TOKEN_PATTERN = r"[a-z0-9]+(?:\.[0-9]+)?"
+TOKENIZER_VERSION = 1
+
+ARRAY_NAMES = ("terms", "idf", "doc_len", "postings_ptr", "postings_doc", "postings_tf")
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenize text for BM25 with light normalization."""
+    return re.findall(TOKEN_PATTERN, text.lower())
+
+
+def bm25_document(chunk: Dict) -> str:
+    """Text indexed for a chunk: heading plus content."""
+    return chunk["heading_text"] + " " + chunk["content"]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over CSR postings.
+
+    Postings for term t are postings_doc[postings_ptr[t]:postings_ptr[t + 1]]
+    (ascending document ids) with matching term frequencies in postings_tf.
+    """
+
+    def __init__(
+        self,
+        terms,
+        idf,
+        doc_len,
+        postings_ptr,
+        postings_doc,
+        postings_tf,
+        avgdl: float,
+        k1: float = config.BM25_K1,
+        b: float = config.BM25_B
+    ):
+        self.terms = terms
+        self.term_ids = {term: i for i, term in enumerate(terms.tolist())}
+        self.idf = idf
+        self.doc_len = doc_len
+        self.postings_ptr = postings_ptr
+        self.postings_doc = postings_doc
+        self.postings_tf = postings_tf
+        self.avgdl = avgdl
+        self.k1 = k1
+        self.b = b
+        self.corpus_size = len(doc_len)
+
+    @classmethod
+    def build(
+        cls,
+        tokenized_corpus: List[List[str]],
+        k1: float = config.BM25_K1,
+        b: float = config.BM25_B,
+        epsilon: float = config.BM25_EPSILON
+    ) -> "BM25Index":
+        """Build postings and IDF from tokenized documents."""
+        term_ids: Dict[str, int] = {}
+        postings: List[List[tuple]] = []
+        doc_len = np.zeros(len(tokenized_corpus), dtype=np.int64)
+
+        for doc_id, tokens in enumerate(tokenized_corpus):
+            doc_len[doc_id] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_id = term_ids.setdefault(term, len(term_ids))
+                if term_id == len(postings):
+                    postings.append([])
+                postings[term_id].append((doc_id, tf))
+
+        corpus_size = len(tokenized_corpus)
+        avgdl = float(doc_len.sum()) / corpus_size if corpus_size else 0.0
+
+        # IDF with BM25Okapi's epsilon floor for negative values
+        idf = np.zeros(len(postings), dtype=np.float64)
+        idf_sum = 0.0
+        negative = []
+        for term_id, plist in enumerate(postings):
+            df = len(plist)
+            value = math.log(corpus_size - df + 0.5) - math.log(df + 0.5)
+            idf[term_id] = value
+            idf_sum += value
+            if value < 0:
+                negative.append(term_id)
+        if len(postings):
+            idf[negative] = epsilon * (idf_sum / len(postings))
+
+        postings_ptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        postings_ptr[1:] = np.cumsum([len(plist) for plist in postings])
+        flat = [entry for plist in postings for entry in plist]
+        postings_doc = np.array([d for d, _ in flat], dtype=np.int32)
+        postings_tf = np.array([tf for _, tf in flat], dtype=np.int32)
+
+        terms = np.array(list(term_ids), dtype=str)
+        return cls(terms, idf, doc_len, postings_ptr, postings_doc, postings_tf, avgdl, k1, b)
+
+    def save(self, directory: Path, generation: Optional[str] = None):
+        """Persist arrays and parameters (with tokenizer version and build generation)."""
+        save_arrays(
+            directory,
+            {
+                "terms": self.terms,
+                "idf": self.idf,
+                "doc_len": self.doc_len,
+                "postings_ptr": self.postings_ptr,
+                "postings_doc": self.postings_doc,
+                "postings_tf": self.postings_tf,
+            },
+            {
+                "tokenizer_version": TOKENIZER_VERSION,
+                "token_pattern": TOKEN_PATTERN,
+                "corpus_size": self.corpus_size,
+                "avgdl": self.avgdl,
+                "k1": self.k1,
+                "b": self.b,
+                "generation": generation,
+            }
+        )
+
+    @classmethod
+    def load(
+        cls,
+        directory: Path,
+        expected_docs: Optional[int] = None,
+        generation: Optional[str] = None
+    ) -> Optional["BM25Index"]:
+        """
+        Load a persisted index.
+
+        Returns None if it is missing, was built with different tokenizer
+        rules, does not match the expected corpus size, or was saved by a
+        build other than `generation` (the loaded manifest's); the caller
+        should then rebuild.
+        """
+        meta = load_meta(directory)
+        if meta is None:
+            return None
+        if (meta.get("tokenizer_version") != TOKENIZER_VERSION
+                or meta.get("token_pattern") != TOKEN_PATTERN
+                or meta.get("generation") != generation):
+            return None
+        if expected_docs is not None and meta.get("corpus_size") != expected_docs:
+            return None
+
+        arrays, meta = load_arrays(directory, ARRAY_NAMES)
+        return cls(
+            arrays["terms"], arrays["idf"], arrays["doc_len"],
+            arrays["postings_ptr"], arrays["postings_doc"], arrays["postings_tf"],
+            avgdl=meta["avgdl"], k1=meta["k1"], b=meta["b"]
+        )
+
+    def get_scores(self, query_tokens: List[str], indices=None):
+        """
+        BM25 scores for the query tokens.
+
+        Args:
+            query_tokens: Tokens from tokenize(); repeats count repeatedly
+            indices: Optional candidate document ids. When given, only
+                those documents are scored (by binary-searching each query
+                term's postings) and the result is aligned with indices.
+
+        Returns:
+            Scores for every document, or for each of indices
+        """
+        if indices is None:
+            scores = np.zeros(self.corpus_size)
+            for token in query_tokens:
+                term_id = self.term_ids.get(token)
+                if term_id is None:
+                    continue
+                docs, tf = self._postings(term_id)
+                scores[docs] += self._term_weights(term_id, docs, tf)
+            return scores
+
+        indices = np.asarray(indices, dtype=np.int64)
+        order = np.argsort(indices, kind="stable")
+        sorted_indices = indices[order]
+        scores = np.zeros(len(indices))
+
+        for token in query_tokens:
+            term_id = self.term_ids.get(token)
+            if term_id is None:
+                continue
+            docs, tf = self._postings(term_id)
+            if not len(docs):
+                continue
+            pos = np.searchsorted(docs, sorted_indices)
+            pos_clipped = np.minimum(pos, len(docs) - 1)
+            hit = (pos < len(docs)) & (docs[pos_clipped] == sorted_indices)
+            if not hit.any():
+                continue
+            matched = pos[hit]
+            scores[order[hit]] += self._term_weights(term_id, docs[matched], tf[matched])
+        return scores
+
+    def _postings(self, term_id: int):
+        start, end = self.postings_ptr[term_id], self.postings_ptr[term_id + 1]
+        return self.postings_doc[start:end], self.postings_tf[start:end]
+
+    def _term_weights(self, term_id: int, docs, tf):
+        """BM25 contribution of one term for the given documents."""
+        dl = self.doc_len[docs]
+        return self.idf[term_id] * (
+            tf * (self.k1 + 1)
+            / (tf + self.k1 * (1 - self.b + self.b * dl / self.avgdl))
+        )
@@ -0,0 +1,329 @@
+"""Bounded in-process caches with optional SQLite persistence.
+
+The in-memory layer is a plain LRU. When a SQLiteStore is attached, misses
+fall through to disk and new entries are written back, so separate CLI
+processes and daemon restarts share the same cache file. With a TTL,
+entries older than ttl seconds (in memory or on disk) count as misses, and
+expired rows are deleted from disk, which keeps the file bounded.
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import struct
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+def normalize_query(query_text: str) -> str:
+    """Canonical cache key form of a query (whitespace-collapsed)."""
+    return " ".join(query_text.split())
+
+
+class SQLiteStore:
+    """Key/value blob store in a single SQLite table.
+
+    Writes go through a background thread that commits them in batches,
+    so put() never waits on the disk. Every row records when it was
+    written, which lets prune() delete expired entries.
+
+    A connection inherited across fork() must not be used by the child, so
+    each process opens its own on first use (and starts its own writer).
+    """
+
+    def __init__(self, path: Path, table: str = "cache"):
+        self.path = Path(path)
+        self.table = table
+        self._conn = None
+        self._conn_pid = None
+        self._disabled = False
+        self._lock = threading.Lock()
+        self._writes: Optional["queue.Queue"] = None
+        self._writer_pid = None
+        _stores.add(self)
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._disabled:
+            return None
+        if self._conn_pid != os.getpid():
+            # Forked child: drop (without closing) the parent's connection
+            self._conn = None
+        if self._conn is None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(
+                    str(self.path), timeout=1.0, check_same_thread=False
+                )
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} "
+                    "(key TEXT PRIMARY KEY, value BLOB, stored_at REAL NOT NULL DEFAULT 0)"
+                )
+                columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({self.table})")]
+                if "stored_at" not in columns:
+                    # Table from before write times were kept: its rows count as oldest
+                    self._conn.execute(
+                        f"ALTER TABLE {self.table} ADD COLUMN stored_at REAL NOT NULL DEFAULT 0"
+                    )
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.table}_stored_at ON {self.table} (stored_at)"
+                )
+                self._conn.commit()
+                self._conn_pid = os.getpid()
+            except sqlite3.Error as e:
+                print(f"Warning: Disk cache unavailable ({self.path}): {e}")
+                self._disabled = True
+                self._conn = None
+        return self._conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        return row[0] if row else None
+
+    def put(self, key: str, value: bytes, stored_at: Optional[float] = None):
+        """Queue a write; the writer thread commits it shortly after."""
+        self._queue_write((key, value, time.time() if stored_at is None else stored_at))
+
+    def delete(self, key: str):
+        """Queue the removal of one entry."""
+        self._queue_write((key, None, 0.0))
+
+    def prune(self, older_than: float) -> int:
+        """
+        Delete entries written before older_than (a time.time() value).
+
+        Returns:
+            Number of rows deleted
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return 0
+            try:
+                deleted = conn.execute(
+                    f"DELETE FROM {self.table} WHERE stored_at < ?", (older_than,)
+                ).rowcount
+                conn.commit()
+            except sqlite3.Error:
+                return 0
+        return deleted
+
+    def clear(self):
+        self.flush()
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(f"DELETE FROM {self.table}")
+                conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def flush(self):
+        """Block until every queued write from this process is committed."""
+        if self._writes is not None and self._writer_pid == os.getpid():
+            self._writes.join()
+
+    def _queue_write(self, write: Tuple[str, Optional[bytes], float]):
+        if self._disabled:
+            return
+        if self._writer_pid != os.getpid():
+            # First write in this process (the parent's writer thread does
+            # not survive fork)
+            with self._lock:
+                if self._writer_pid != os.getpid():
+                    self._writes = queue.Queue()
+                    threading.Thread(
+                        target=self._write_loop, args=(self._writes,),
+                        name=f"sqlite-{self.table}", daemon=True
+                    ).start()
+                    self._writer_pid = os.getpid()
+        self._writes.put(write)
+
+    def _write_loop(self, writes: "queue.Queue"):
+        while True:
+            # Everything queued while the previous batch was committing
+            # goes into the next transaction
+            batch = [writes.get()]
+            while True:
+                try:
+                    batch.append(writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._commit(batch)
+            finally:
+                for _ in batch:
+                    writes.task_done()
+
+    def _commit(self, batch: List[Tuple[str, Optional[bytes], float]]):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                for key, value, stored_at in batch:
+                    if value is None:
+                        conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    else:
+                        conn.execute(
+                            f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at) "
+                            "VALUES (?, ?, ?)",
+                            (key, value, stored_at)
+                        )
+                conn.commit()
+            except sqlite3.Error:
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+
+
+# Every store, so queued writes can be committed before the process exits
+_stores: "weakref.WeakSet[SQLiteStore]" = weakref.WeakSet()
+
+
+def flush_stores():
+    """Commit the queued writes of every SQLiteStore (runs at exit)."""
+    for store in list(_stores):
+        store.flush()
+
+
+atexit.register(flush_stores)
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with hit/miss counters and an optional TTL.
+
+    Args:
+        maxsize: Maximum number of in-memory entries
+        store: Optional SQLiteStore for persistence across processes
+        encode: Value -> bytes for the store (required with store)
+        decode: bytes -> value for the store (required with store)
+        ttl: Optional entry lifetime in seconds (None = never expires).
+            Stored blobs are prefixed with their write time so the TTL
+            also applies to entries written by other processes. Expired
+            disk entries are deleted when read and when the cache is created.
+    """
+
+    _STAMP = struct.Struct("<d")
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        store: Optional[SQLiteStore] = None,
+        encode: Optional[Callable[[Any], bytes]] = None,
+        decode: Optional[Callable[[bytes], Any]] = None,
+        ttl: Optional[float] = None
+    ):
+        self.maxsize = maxsize
+        self.store = store
+        self.encode = encode
+        self.decode = decode
+        self.ttl = ttl
+        # key -> (value, stored_at)
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        if store is not None and ttl is not None:
+            store.prune(time.time() - ttl)
+
+    def _fresh(self, stored_at: float) -> bool:
+        return self.ttl is None or time.time() - stored_at < self.ttl
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self._fresh(stored_at):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expired += 1
+
+        if self.store is not None:
+            blob = self.store.get(str(key))
+            if blob is not None:
+                value, stored_at = self._unpack(blob)
+                if value is not None and self._fresh(stored_at):
+                    with self._lock:
+                        self.disk_hits += 1
+                        self._insert(key, value, stored_at)
+                    return value
+                self.store.delete(str(key))
+                with self._lock:
+                    self.expired += 1
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any):
+        """Insert a value (and write it through to the store if attached)."""
+        stored_at = time.time()
+        with self._lock:
+            self._insert(key, value, stored_at)
+
+        if self.store is not None:
+            blob = self.encode(value)
+            if self.ttl is not None:
+                blob = self._STAMP.pack(stored_at) + blob
+            self.store.put(str(key), blob, stored_at)
+
+    def _unpack(self, blob: bytes) -> Tuple[Optional[Any], float]:
+        """Decode a stored blob into (value, stored_at); value None if unreadable."""
+        stored_at = 0.0
+        try:
+            if self.ttl is not None:
+                (stored_at,) = self._STAMP.unpack_from(blob)
+                blob = blob[self._STAMP.size:]
+            return self.decode(blob), stored_at
+        except Exception:
+            return None, stored_at
+
+    def _insert(self, key: Hashable, value: Any, stored_at: float):
+        self._data[key] = (value, stored_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """Empty the in-memory layer and reset counters (disk is kept)."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.disk_hits = self.misses = self.expired = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for reporting."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+            }
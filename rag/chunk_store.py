@@ -0,0 +1,177 @@
+"""Compact on-disk chunk store with lazily loaded content.
+
+Layout (all files live next to each other in the index directory):
+
+    chunks.json          Chunk metadata (every field except content), plus
+                         the content size and a digest of the offsets table
+    chunk_offsets.npy    Fixed-width (N, 2) uint64 table: [offset, length]
+    chunk_content.bin    UTF-8 content of every chunk, concatenated
+
+Metadata is small and loaded eagerly for filtering and ranking. Content is
+memory-mapped and decoded only for chunks that are actually returned.
+
+The three files are renamed into place one after another, metadata last.
+ChunkStore checks the content size and offsets digest recorded in the
+metadata, so a reader that opens the store mid-rewrite (old metadata with
+new offsets or content) retries instead of slicing the wrong text.
+"""
+import hashlib
+import json
+import mmap
+import os
+import time
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+from . import config
+from .chunker import Chunk
+
+# Chunk field order, so materialized chunks serialize like Chunk.to_dict()
+CHUNK_FIELDS = [f.name for f in fields(Chunk)]
+
+CHUNK_STORE_VERSION = 1
+# Opening a store that is being rewritten fails the consistency check;
+# retry this many times, OPEN_RETRY_DELAY seconds apart
+OPEN_ATTEMPTS = 5
+OPEN_RETRY_DELAY = 0.1
+
+
+def _offsets_digest(offsets) -> str:
+    return hashlib.blake2b(np.ascontiguousarray(offsets).tobytes(), digest_size=16).hexdigest()
+
+
+def _sibling(meta_file: Path, default: Path) -> Path:
+    """Resolve a store file next to meta_file using the configured file name."""
+    return Path(meta_file).parent / default.name
+
+
+def write_chunk_store(chunk_dicts: List[Dict[str, Any]], meta_file: Path = config.INDEX_FILE):
+    """
+    Write chunk dicts (as produced by Chunk.to_dict) to the chunk store.
+
+    Each file is written to a temp path and renamed into place so a running
+    retriever that has the old content blob mapped keeps a valid mapping.
+    The metadata goes last and records the content size and offsets digest
+    that ChunkStore checks.
+    """
+    meta_file = Path(meta_file)
+    offsets_file = _sibling(meta_file, config.CHUNK_OFFSETS_FILE)
+    content_file = _sibling(meta_file, config.CHUNK_CONTENT_FILE)
+
+    offsets = np.zeros((len(chunk_dicts), 2), dtype=np.uint64)
+    metadata = []
+
+    tmp_content = content_file.with_name(content_file.name + ".tmp")
+    with open(tmp_content, 'wb') as f:
+        position = 0
+        for i, chunk_dict in enumerate(chunk_dicts):
+            data = chunk_dict.get("content", "").encode("utf-8")
+            f.write(data)
+            offsets[i] = (position, len(data))
+            position += len(data)
+            metadata.append({k: v for k, v in chunk_dict.items() if k != "content"})
+
+    tmp_offsets = offsets_file.with_name(offsets_file.name + ".tmp")
+    with open(tmp_offsets, 'wb') as f:
+        np.save(f, offsets)
+
+    tmp_meta = meta_file.with_name(meta_file.name + ".tmp")
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump(
+            {
+                "version": CHUNK_STORE_VERSION,
+                "content_size": position,
+                "offsets_digest": _offsets_digest(offsets),
+                "chunks": metadata,
+            },
+            f, ensure_ascii=False, separators=(",", ":")
+        )
+
+    os.replace(tmp_content, content_file)
+    os.replace(tmp_offsets, offsets_file)
+    os.replace(tmp_meta, meta_file)
+
+
+class ChunkStore:
+    """
+    Read-only view of a chunk store.
+
+    Attributes:
+        meta: List of chunk metadata dicts (no content), one per chunk
+
+    Indexing or iterating the store yields full chunk dicts with content
+    decoded on access, so it can stand in for a list of chunks.
+    """
+
+    def __init__(self, meta_file: Path = config.INDEX_FILE):
+        meta_file = Path(meta_file)
+        for attempt in range(OPEN_ATTEMPTS):
+            try:
+                self._open(meta_file)
+                return
+            except ValueError:
+                # Possibly caught between the renames of a rebuild
+                if attempt == OPEN_ATTEMPTS - 1:
+                    raise
+                time.sleep(OPEN_RETRY_DELAY)
+
+    def _open(self, meta_file: Path):
+        offsets_file = _sibling(meta_file, config.CHUNK_OFFSETS_FILE)
+        content_file = _sibling(meta_file, config.CHUNK_CONTENT_FILE)
+
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        # Stores from before the consistency fields are a bare list
+        header = stored if isinstance(stored, dict) else {}
+        self.meta: List[Dict[str, Any]] = header.get("chunks", stored)
+
+        self.offsets = np.load(offsets_file, mmap_mode="r")
+        if len(self.offsets) != len(self.meta):
+            raise ValueError(
+                f"Chunk store is inconsistent: {len(self.meta)} metadata records, "
+                f"{len(self.offsets)} content offsets"
+            )
+
+        self._content = b""
+        with open(content_file, 'rb') as f:
+            content_size = os.fstat(f.fileno()).st_size
+            if "content_size" in header and (
+                    content_size != header["content_size"]
+                    or _offsets_digest(self.offsets) != header["offsets_digest"]):
+                raise ValueError(
+                    "Chunk store is inconsistent: content or offsets do not match "
+                    "the metadata (written by another build?)"
+                )
+            if content_size > 0:
+                self._content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        return self.chunk(i)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self.meta)):
+            yield self.chunk(i)
+
+    def content(self, i: int) -> str:
+        """Decode the content of chunk i."""
+        offset, length = (int(x) for x in self.offsets[i])
+        return self._content[offset:offset + length].decode("utf-8")
+
+    def chunk(self, i: int) -> Dict[str, Any]:
+        """Return chunk i as a full dict (metadata + content)."""
+        meta = self.meta[i]
+        chunk = {}
+        for name in CHUNK_FIELDS:
+            if name == "content":
+                chunk[name] = self.content(i)
+            elif name in meta:
+                chunk[name] = meta[name]
+        for name, value in meta.items():
+            chunk.setdefault(name, value)
+        return chunk
@@ -2,7 +2,7 @@
 import re
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 
 from . import config
 
@@ -20,6 +20,7 @@ class Chunk:
     line_range: Tuple[int, int]      # (730, 827)
     metadata: Dict[str, Any]         # From metadata.py
     outgoing_references: List[str]   # Section refs found in content
+    routing_target: Optional[str] = None  # "CI_RULES.md" if content routes to that doc
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dict for JSON serialization."""
@@ -186,6 +187,10 @@ def chunk_markdown_file(
     # Apply merge rules
     chunks = merge_small_chunks(chunks, min_lines=config.MIN_CHUNK_LINES)
 
+    # Routing targets are static per chunk; extract once for query-time suppression
+    for chunk in chunks:
+        chunk.routing_target = extract_routing_target(chunk.content)
+
     return chunks
 
 
@@ -209,6 +214,22 @@ def extract_section_references(content: str) -> List[str]:
     return references
 
 
+def extract_routing_target(content: str) -> Optional[str]:
+    """
+    Find the doc this content routes to, per config.ROUTING_PATTERNS.
+
+    Patterns are tried in order and the first match wins.
+
+    Returns:
+        "DEBUG_RUNBOOK.md" for "See DEBUG_RUNBOOK.md \u00a7 Triage", or None
+    """
+    for pattern in config.ROUTING_PATTERNS:
+        match = re.search(pattern, content)
+        if match:
+            return match.group(1)
+    return None
+
+
 def merge_small_chunks(chunks: List[Chunk], min_lines: int = 20) -> List[Chunk]:
     """
     Merge chunks smaller than min_lines into their parent section.
@@ -0,0 +1,83 @@
+"""Thin client for the RAG query daemon (python -m rag serve).
+
+http.client is imported only once a daemon accepts the connection, so the
+CLI's usual no-daemon fallback does not pay for it.
+"""
+import json
+import socket
+from typing import List, Dict, Any, Optional
+
+from . import config
+
+# Product token in the daemon's Server header; responses without it come
+# from some other service on the port
+DAEMON_SERVER_NAME = "RAGQueryDaemon"
+
+
+def query_daemon(
+    query_text: str,
+    top_k: int = config.DEFAULT_TOP_K,
+    filter_status: Optional[List[str]] = None,
+    enable_precision_filter: bool = True,
+    host: str = config.SERVER_HOST,
+    port: int = config.SERVER_PORT,
+    timeout: float = config.SERVER_CONNECT_TIMEOUT
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Send a query to a running daemon.
+
+    Returns:
+        List of result dicts (same shape as RAGRetriever.query), or None
+        if no daemon is listening (or another service answers on the port)
+        so the caller can fall back to a local retriever.
+
+    Raises:
+        RuntimeError: If the daemon is reachable but rejects the query
+    """
+    payload = json.dumps({
+        "query": query_text,
+        "top_k": top_k,
+        "filter_status": filter_status,
+        "enable_precision_filter": enable_precision_filter
+    }).encode("utf-8")
+
+    try:
+        sock = socket.create_connection((host, port), timeout=timeout)
+    except OSError:
+        return None
+
+    import http.client
+
+    conn = http.client.HTTPConnection(host, port)
+    # Until the response headers prove a daemon is answering, wait at most
+    # SERVER_RESPONSE_TIMEOUT: a listener that never replies must not hang
+    # the CLI
+    sock.settimeout(config.SERVER_RESPONSE_TIMEOUT)
+    conn.sock = sock
+    try:
+        conn.request(
+            "POST", "/query", body=payload,
+            headers={"Content-Type": "application/json"}
+        )
+        response = conn.getresponse()
+        if not (response.getheader("Server") or "").startswith(DAEMON_SERVER_NAME + "/"):
+            return None
+        sock.settimeout(None)
+        raw = response.read()
+    except (OSError, http.client.HTTPException):
+        # Not an HTTP service, or the connection was reset or timed out
+        # (socket.timeout is an OSError)
+        return None
+    finally:
+        conn.close()
+
+    try:
+        body = json.loads(raw or b"{}")
+    except ValueError:
+        body = {}
+
+    if response.status != 200:
+        raise RuntimeError(body.get("error", f"daemon returned HTTP {response.status}"))
+
+    return body["results"]
+
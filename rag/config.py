@@ -13,8 +13,14 @@ from pathlib import Path
 
 DOCS_ROOT = Path("docs")
 OUTPUT_DIR = Path("outputs/rag")
-INDEX_FILE = OUTPUT_DIR / "index.jsonl"
+INDEX_FILE = OUTPUT_DIR / "chunks.json"                # Chunk metadata
+CHUNK_OFFSETS_FILE = OUTPUT_DIR / "chunk_offsets.npy"  # Content offset table
+CHUNK_CONTENT_FILE = OUTPUT_DIR / "chunk_content.bin"  # Concatenated content
 EMBEDDINGS_FILE = OUTPUT_DIR / "embeddings.npy"
+BM25_DIR = OUTPUT_DIR / "bm25"                         # Precomputed BM25 postings
+PRECISION_DIR = OUTPUT_DIR / "precision"               # Precision-filter keyword index
+ANN_DIR = OUTPUT_DIR / "ann"                           # IVF nearest-neighbour index
+INDEX_MANIFEST_FILE = OUTPUT_DIR / "index_manifest.json"  # Encoder that built the index
 BUILD_LOG_FILE = OUTPUT_DIR / "build_log.jsonl"
 CORE_DOC_INDEX = DOCS_ROOT / "CORE_DOCS_INDEX.md"
 
@@ -25,6 +31,25 @@ CORE_DOC_INDEX = DOCS_ROOT / "CORE_DOCS_INDEX.md"
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 EMBEDDING_DIM = 384
 
+# Encoder backend (see rag/encoders.py). Changing it requires a rebuild;
+# the retriever refuses an index built with a different backend.
+#   "sentence-transformers"  PyTorch (default)
+#   "onnx"                   ONNX Runtime; pip install 'sentence-transformers[onnx]'
+#   "hashing"                Deterministic, no model download (offline builds/tests)
+EMBEDDING_BACKEND = "sentence-transformers"
+
+# ONNX export to load with the "onnx" backend. The default is the fp32
+# export; int8-quantized exports (e.g. "onnx/model_qint8_avx512_vnni.onnx",
+# "onnx/model_qint8_avx2.onnx", "onnx/model_qint8_arm64.onnx") are faster on
+# CPU and use less memory. Models without one can be quantized with
+# sentence_transformers.export_dynamic_quantized_onnx_model.
+ONNX_MODEL_FILE = "onnx/model.onnx"
+
+# Open embedding matrices with np.load(mmap_mode="r") instead of reading
+# them into private memory. Processes on one host then share page-cache
+# pages, and load time no longer grows with corpus size.
+EMBEDDINGS_MMAP = True
+
 # =============================================================================
 # Scoring weights
 # =============================================================================
@@ -37,6 +62,11 @@ SEMANTIC_WEIGHT = 0.6
 KEYWORD_WEIGHT = 0.25
 AUTHORITY_WEIGHT = 0.15
 
+# BM25 parameters (same defaults as rank_bm25.BM25Okapi)
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+
 # =============================================================================
 # Authority boost values
 # =============================================================================
@@ -77,6 +107,45 @@ PROTECTED_HEADING_KEYWORDS = [
 DEFAULT_TOP_K = 5
 VERIFIED_DATE_DECAY_DAYS = 60   # Freshness half-life in days
 
+# Query embedding cache (keyed on model name + normalized query text).
+# The disk store lets separate CLI processes and daemon restarts reuse
+# embeddings for repeated queries.
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+ENABLE_QUERY_EMBEDDING_DISK_CACHE = True
+QUERY_EMBEDDING_CACHE_FILE = OUTPUT_DIR / "query_embedding_cache.sqlite"
+
+# Query result cache (keyed on normalized query, top_k, filter_status, the
+# precision-filter flag, the settings in this file and the index generation,
+# which every rebuild changes). Entries also expire after RESULT_CACHE_TTL
+# seconds; expired rows are deleted from the disk store when read and when a
+# process opens it, which bounds its size. It is shared by CLI processes.
+ENABLE_RESULT_CACHE = True
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL = 3600          # Seconds; None = until the next rebuild
+ENABLE_RESULT_DISK_CACHE = True
+RESULT_CACHE_FILE = OUTPUT_DIR / "query_result_cache.sqlite"
+
+# Per-stage query timings (RAGRetriever.stats(), python -m rag.query --timings).
+# Off by default; the rolling percentiles cover the last QUERY_TIMINGS_WINDOW
+# queries.
+ENABLE_QUERY_TIMINGS = False
+QUERY_TIMINGS_WINDOW = 1000
+
+# =============================================================================
+# Approximate nearest-neighbour search (large corpora)
+# =============================================================================
+# When the precision filter does not narrow the candidates, semantic search
+# would score every chunk. With at least ANN_MIN_CHUNKS chunks the indexer
+# builds an IVF index and the retriever scores only the chunks in the
+# ANN_NPROBE clusters nearest the query. Raise ANN_NPROBE for recall, lower
+# it for latency. Below the threshold, search stays exact.
+
+ENABLE_ANN = True
+ANN_MIN_CHUNKS = 20000
+ANN_NPROBE = 16
+ANN_KMEANS_ITERATIONS = 10
+ANN_TRAIN_SIZE = 100000
+
 # =============================================================================
 # Layer 1: Quick Reference
 # =============================================================================
@@ -150,3 +219,52 @@ STRUCTURED_CANONICAL_THRESHOLD = 0.8
 STRUCTURED_WITHIN_FILE_SEMANTIC_WEIGHT = 0.7
 STRUCTURED_WITHIN_FILE_KEYWORD_WEIGHT = 0.3
 STRUCTURED_WITHIN_FILE_AUTHORITY_WEIGHT = 0.0
+
+# =============================================================================
+# CUSTOMIZE: Sharded indexes
+# =============================================================================
+# Split the docs into independently built indexes, e.g. one per collection.
+# Each shard maps a name to path prefixes (relative to the repo root) and is
+# built with: python -m rag.indexer --shard NAME
+# When SHARDS is non-empty, queries fan out to every shard in parallel and
+# the per-shard top-k lists are merged by final score.
+#
+# Example:
+#   SHARDS = {
+#       "theory": ["docs/theory"],
+#       "guides": ["docs/guides", "docs/workflows"],
+#   }
+
+SHARDS = {}
+SHARDS_DIR = OUTPUT_DIR / "shards"    # One index directory per shard
+SHARD_MAX_WORKERS = 4                 # Threads used to query shards
+
+# =============================================================================
+# Query daemon (python -m rag serve)
+# =============================================================================
+# A persistent process that keeps the index and model loaded. The query CLI
+# uses it automatically when one is listening on this address.
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_CONNECT_TIMEOUT = 0.05   # Seconds to wait before falling back to local
+SERVER_RESPONSE_TIMEOUT = 30.0  # Seconds to wait for the daemon's response headers
+SERVER_LOG_REQUESTS = False
+SERVER_WORKERS = 1              # >1: fork workers after loading (POSIX)
+
+# =============================================================================
+# Async queries (RAGRetriever.aquery, rag.query.aquery_docs)
+# =============================================================================
+# Embedding and scoring run on a shared thread pool so they never block the
+# event loop; NumPy and the encoder release the GIL for most of the work.
+
+ASYNC_MAX_WORKERS = 4
+
+# =============================================================================
+# Profiling (--profile on python -m rag.query and python -m rag.indexer)
+# =============================================================================
+# One cProfile .prof file per phase (load, load_model, query / build), plus a
+# summary of the PROFILE_TOP_N functions with the most own time.
+
+PROFILE_DIR = OUTPUT_DIR / "profiles"
+PROFILE_TOP_N = 15
@@ -0,0 +1,274 @@
+"""Embedding backends and the index manifest that records which one was used.
+
+Backends (config.EMBEDDING_BACKEND):
+    sentence-transformers  PyTorch model (default)
+    onnx                   Same model through ONNX Runtime; set ONNX_MODEL_FILE
+                           to an int8-quantized export for faster CPU inference
+    hashing                Deterministic feature hashing; no model download,
+                           for offline builds and tests (lexical, not semantic)
+
+Every backend returns L2-normalized float32 rows. The indexer writes
+index_manifest.json next to chunks.json recording the backend identity and
+dimension; the retriever refuses an index whose manifest does not match
+the configured backend.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import sys
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from . import config
+from . import profiling
+from . import startup
+
+MANIFEST_VERSION = 1
+_HASH_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class Encoder(ABC):
+    """Base class: turns texts into L2-normalized float32 embeddings.
+
+    encode() must be safe to call from several threads at once.
+    """
+
+    backend = ""
+    requires: tuple = ()   # Modules that must be importable
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @property
+    def identity(self) -> str:
+        """String that changes whenever embeddings would change."""
+        return encoder_identity(self.backend, self.model_name)
+
+    @property
+    @abstractmethod
+    def dim(self) -> int:
+        """Embedding dimension."""
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False):
+        """Embed texts as an (n, dim) float32 array of unit vectors."""
+
+
+class SentenceTransformerEncoder(Encoder):
+    """sentence-transformers on PyTorch."""
+
+    backend = "sentence-transformers"
+    requires = ("sentence_transformers",)
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        with startup.phase("import sentence_transformers"):
+            from sentence_transformers import SentenceTransformer
+        with startup.phase("load model"):
+            self.model = SentenceTransformer(model_name, **self._model_kwargs())
+        # Hugging Face fast tokenizers raise "Already borrowed" when one
+        # instance is used from several threads at once
+        self._encode_lock = threading.Lock()
+
+    def _model_kwargs(self) -> Dict[str, Any]:
+        return {}
+
+    @property
+    def dim(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False):
+        with self._encode_lock:
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=show_progress_bar,
+                normalize_embeddings=True
+            )
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class ONNXEncoder(SentenceTransformerEncoder):
+    """sentence-transformers with the ONNX Runtime backend (optionally int8)."""
+
+    backend = "onnx"
+    requires = ("sentence_transformers", "onnxruntime")
+
+    def _model_kwargs(self) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {"backend": "onnx"}
+        if config.ONNX_MODEL_FILE:
+            kwargs["model_kwargs"] = {"file_name": config.ONNX_MODEL_FILE}
+        return kwargs
+
+
+class HashingEncoder(Encoder):
+    """
+    Signed feature hashing of word unigrams and bigrams.
+
+    Deterministic across processes and machines (blake2b, not hash()), so
+    indexes built with it are reproducible without any model download.
+    """
+
+    backend = "hashing"
+
+    def __init__(self, model_name: str = "feature-hashing", dim: Optional[int] = None):
+        # No model: the name is recorded in the manifest only
+        super().__init__("feature-hashing")
+        self._dim = dim or config.EMBEDDING_DIM
+
+    @property
+    def identity(self) -> str:
+        # The dimension changes every vector, whatever config says
+        return f"{self.backend}:{self._dim}"
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _HASH_TOKEN_PATTERN.findall(text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False):
+        embeddings = np.zeros((len(texts), self._dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value & 1 else -1.0
+                embeddings[row, (value >> 1) % self._dim] += sign
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+
+ENCODERS = {
+    SentenceTransformerEncoder.backend: SentenceTransformerEncoder,
+    ONNXEncoder.backend: ONNXEncoder,
+    HashingEncoder.backend: HashingEncoder,
+}
+
+
+def encoder_identity(backend: Optional[str] = None, model_name: Optional[str] = None) -> str:
+    """Identity of a backend/model pair (default: configured), without loading the model."""
+    backend = backend or config.EMBEDDING_BACKEND
+    model_name = model_name or config.EMBEDDING_MODEL
+    if backend == ONNXEncoder.backend:
+        return f"{backend}:{model_name}:{config.ONNX_MODEL_FILE or 'model.onnx'}"
+    if backend == HashingEncoder.backend:
+        return f"{backend}:{config.EMBEDDING_DIM}"
+    return f"{backend}:{model_name}"
+
+
+def backend_available(backend: Optional[str] = None) -> bool:
+    """True if the backend's packages are installed (without importing them)."""
+    encoder_class = ENCODERS.get(backend or config.EMBEDDING_BACKEND)
+    if encoder_class is None:
+        return False
+    return all(importlib.util.find_spec(module) is not None for module in encoder_class.requires)
+
+
+def load_encoder(backend: Optional[str] = None, model_name: Optional[str] = None) -> Encoder:
+    """Create the configured encoder; exits with an install hint on failure."""
+    backend = backend or config.EMBEDDING_BACKEND
+    model_name = model_name or config.EMBEDDING_MODEL
+    encoder_class = ENCODERS.get(backend)
+    if encoder_class is None:
+        print(f"Error: Unknown embedding backend: {backend}")
+        print(f"Available backends: {', '.join(ENCODERS)}")
+        sys.exit(1)
+
+    if not backend_available(backend):
+        print(f"Error: Embedding backend '{backend}' is not installed")
+        if backend == ONNXEncoder.backend:
+            print("Install with: pip install 'sentence-transformers[onnx]'")
+        else:
+            print("Install with: pip install sentence-transformers")
+        sys.exit(1)
+
+    try:
+        with profiling.phase("load_model"):
+            return encoder_class(model_name)
+    except Exception as e:
+        print(f"Error loading model: {e}")
+        print("If model download failed, check internet connection")
+        sys.exit(1)
+
+
+# =============================================================================
+# Index manifest
+# =============================================================================
+
+def manifest_path(index_file: Path) -> Path:
+    """Manifest location for an index (sibling of chunks.json)."""
+    return Path(index_file).parent / config.INDEX_MANIFEST_FILE.name
+
+
+def new_generation() -> str:
+    """Fresh ID for one index build."""
+    return uuid.uuid4().hex
+
+
+def write_manifest(
+    index_file: Path,
+    encoder: Encoder,
+    num_chunks: int,
+    generation: Optional[str] = None
+):
+    """Record the encoder that produced an index's embeddings.
+
+    Each build also gets a generation ID (fresh unless given), which keys
+    the result cache and ties the ANN index to these embeddings.
+    """
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "generation": generation or new_generation(),
+        "backend": encoder.backend,
+        "model": encoder.model_name,
+        "encoder": encoder.identity,
+        "dim": encoder.dim,
+        "num_chunks": num_chunks,
+    }
+    path = manifest_path(index_file)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(index_file: Path) -> Optional[Dict[str, Any]]:
+    """Read an index's manifest, or None for indexes built before manifests."""
+    path = manifest_path(index_file)
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def check_manifest(manifest: Optional[Dict[str, Any]], embedding_dim: int) -> Optional[str]:
+    """
+    Compare an index manifest against the configured backend.
+
+    Returns:
+        A description of the mismatch, or None if the index is usable
+    """
+    expected = encoder_identity()
+    if manifest is None:
+        # Indexes from before manifests were always sentence-transformers
+        built_with = encoder_identity("sentence-transformers", config.EMBEDDING_MODEL)
+        if expected != built_with:
+            return f"index has no manifest (built with {built_with}), config selects {expected}"
+        return None
+
+    if manifest.get("encoder") != expected:
+        return f"index built with {manifest.get('encoder')}, config selects {expected}"
+    if manifest.get("dim") != embedding_dim:
+        return f"manifest dimension {manifest.get('dim')} != embeddings dimension {embedding_dim}"
+    return None
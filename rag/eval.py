@@ -0,0 +1,334 @@
+"""Retrieval quality and latency in one run.
+
+Usage:
+    # Quick Reference questions from CORE_DOCS_INDEX.md
+    python -m rag.eval
+
+    # Plus a gold set: one JSON object per line,
+    #   {"query": "How do I roll back a deploy?", "files": ["docs/DEBUG_RUNBOOK.md"]}
+    python -m rag.eval --gold eval/gold.jsonl --top 10 --json
+
+Every question is answered by query() twice, with structured lookup on and
+off. Each run reports recall@k (share of a question's expected files found
+in the top k) and MRR (reciprocal rank of the first result from an expected
+file), with p50/p95/p99 latency, overall and per lookup path taken. A result
+counts as relevant when its source file contains an expected path, the rule
+structured lookup uses for Quick Reference sources. Questions whose expected
+files are not in the index are reported and left out of the metrics.
+
+The result cache and the query embedding cache are bypassed, so every
+timed query runs its whole path.
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from . import config
+from .bench import disable_embedding_cache, latency_summary
+from .retriever import normalize_source_path
+
+RECALL_AT = [1, 3, 5, 10]
+
+
+def load_gold(path: Path) -> List[Dict[str, Any]]:
+    """
+    Read a gold file (JSON lines with "query" and "files").
+
+    Returns:
+        [{"query": str, "files": [str, ...], "source": "gold"}, ...]
+    """
+    items = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                files = entry["files"]
+                items.append({
+                    "query": entry["query"],
+                    "files": [files] if isinstance(files, str) else list(files),
+                    "source": "gold",
+                })
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                print(f"Warning: Skipping {path}:{line_number}: {e}")
+    return items
+
+
+def quick_reference_items() -> List[Dict[str, Any]]:
+    """Quick Reference questions paired with their source files."""
+    from .metadata import parse_quick_reference_table
+
+    grouped: Dict[str, List[str]] = {}
+    for question, file_path in parse_quick_reference_table():
+        grouped.setdefault(question, []).append(file_path)
+    return [
+        {"query": question, "files": files, "source": "quick_reference"}
+        for question, files in grouped.items()
+    ]
+
+
+def _is_relevant(source_file: str, expected: List[str]) -> bool:
+    source = normalize_source_path(source_file)
+    return any(normalize_source_path(path) in source for path in expected)
+
+
+def score_results(results: List[Dict[str, Any]], expected: List[str]) -> Dict[str, Any]:
+    """Recall at each cutoff in RECALL_AT and reciprocal rank for one query."""
+    sources = [r["chunk"].get("source_file", "") for r in results]
+
+    reciprocal_rank = 0.0
+    for rank, source in enumerate(sources, start=1):
+        if _is_relevant(source, expected):
+            reciprocal_rank = 1.0 / rank
+            break
+
+    recall = {}
+    for k in RECALL_AT:
+        top = [normalize_source_path(source) for source in sources[:k]]
+        found = sum(
+            1 for path in expected
+            if any(normalize_source_path(path) in source for source in top)
+        )
+        recall[k] = found / len(expected)
+
+    return {"recall": recall, "reciprocal_rank": reciprocal_rank}
+
+
+def _aggregate(rows: List[Dict[str, Any]], top_k: int) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {"queries": len(rows)}
+    if not rows:
+        return summary
+    for k in RECALL_AT:
+        if k <= top_k:
+            summary[f"recall@{k}"] = round(float(np.mean([r["recall"][k] for r in rows])), 3)
+    summary["mrr"] = round(float(np.mean([r["reciprocal_rank"] for r in rows])), 3)
+    summary.update(latency_summary([r["seconds"] for r in rows]))
+    return summary
+
+
+def _path_taken(results: List[Dict[str, Any]]) -> str:
+    """Pipeline path that produced a result list."""
+    if not results:
+        return "none"
+    if "lookup_method" in results[0]:
+        return results[0]["lookup_method"]
+    if results[0].get("layer") == "quick_reference":
+        # Legacy embedding match against Quick Reference questions
+        return "quick_reference_embedding"
+    return "search"
+
+
+def evaluate(
+    retriever,
+    items: List[Dict[str, Any]],
+    top_k: int = config.DEFAULT_TOP_K,
+    structured_lookup: bool = True
+) -> Dict[str, Any]:
+    """
+    Run every item through retriever.query() and score it.
+
+    Args:
+        retriever: RAGRetriever or ShardedRetriever
+        items: {"query", "files"} dicts (see load_gold)
+        top_k: Results per query
+        structured_lookup: Value of config.ENABLE_STRUCTURED_LOOKUP for the run
+
+    Returns:
+        {"overall": {...}, "by_path": {lookup_method: {...}}, "queries": [...]}
+    """
+    saved = config.ENABLE_STRUCTURED_LOOKUP
+    config.ENABLE_STRUCTURED_LOOKUP = structured_lookup
+    try:
+        rows = []
+        for item in items:
+            start = time.perf_counter()
+            results = retriever.query(item["query"], top_k)
+            seconds = time.perf_counter() - start
+
+            row = score_results(results, item["files"])
+            row.update({
+                "query": item["query"],
+                "source": item["source"],
+                "path": _path_taken(results),
+                "seconds": seconds,
+            })
+            rows.append(row)
+    finally:
+        config.ENABLE_STRUCTURED_LOOKUP = saved
+
+    by_path: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_path.setdefault(row["path"], []).append(row)
+
+    return {
+        "overall": _aggregate(rows, top_k),
+        "by_path": {path: _aggregate(path_rows, top_k) for path, path_rows in by_path.items()},
+        "queries": [
+            {
+                "query": row["query"],
+                "source": row["source"],
+                "path": row["path"],
+                "reciprocal_rank": round(row["reciprocal_rank"], 3),
+                "ms": round(row["seconds"] * 1000, 3),
+            }
+            for row in rows
+        ],
+    }
+
+
+def _indexed(retriever, files: List[str]) -> bool:
+    sources = {normalize_source_path(chunk.get("source_file", "")) for chunk in retriever.chunks}
+    return all(
+        any(normalize_source_path(path) in source for source in sources)
+        for path in files
+    )
+
+
+def run_eval(
+    retriever,
+    gold_path: Optional[Path] = None,
+    top_k: int = config.DEFAULT_TOP_K,
+    include_quick_reference: bool = True
+) -> Dict[str, Any]:
+    """
+    Evaluate Quick Reference and gold questions with structured lookup on and off.
+
+    Turns off the retriever's result cache and query embedding cache.
+
+    Returns:
+        {"skipped": [...], "runs": {"structured_lookup": {dataset: evaluate()},
+                                    "no_structured_lookup": {...}}}
+    """
+    datasets: Dict[str, List[Dict[str, Any]]] = {}
+    if include_quick_reference:
+        datasets["quick_reference"] = quick_reference_items()
+    if gold_path is not None:
+        datasets["gold"] = load_gold(gold_path)
+
+    skipped = []
+    for name, items in datasets.items():
+        usable = []
+        for item in items:
+            if _indexed(retriever, item["files"]):
+                usable.append(item)
+            else:
+                skipped.append({"query": item["query"], "files": item["files"], "source": name})
+        datasets[name] = usable
+
+    # Every timed query runs its whole path; the model load is not timed
+    disable_embedding_cache(retriever)
+    retriever.result_cache = None
+    retriever.model.encode(["warmup"])
+
+    runs = {}
+    for run_name, structured in (("structured_lookup", True), ("no_structured_lookup", False)):
+        runs[run_name] = {
+            name: evaluate(retriever, items, top_k, structured)
+            for name, items in datasets.items()
+        }
+
+    return {"top_k": top_k, "skipped": skipped, "runs": runs}
+
+
+def print_report(report: Dict[str, Any]):
+    """Print recall, MRR and latency per run, dataset and lookup path."""
+    top_k = report["top_k"]
+    recall_columns = [k for k in RECALL_AT if k <= top_k]
+    header = (
+        f"  {'':<36}{'n':>4}"
+        + "".join(f"{'R@' + str(k):>7}" for k in recall_columns)
+        + f"{'MRR':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+
+    def row(label: str, summary: Dict[str, Any]):
+        if not summary["queries"]:
+            print(f"  {label:<36}{0:>4}")
+            return
+        print(
+            f"  {label:<36}{summary['queries']:>4}"
+            + "".join(f"{summary[f'recall@{k}']:>7.3f}" for k in recall_columns)
+            + f"{summary['mrr']:>7.3f}{summary['p50_ms']:>9.2f}"
+            f"{summary['p95_ms']:>9.2f}{summary['p99_ms']:>9.2f}"
+        )
+
+    for run_name, datasets in report["runs"].items():
+        print(f"\n{run_name.replace('_', ' ')}:")
+        print(header)
+        for dataset, result in datasets.items():
+            row(dataset, result["overall"])
+            for path, summary in result["by_path"].items():
+                row(f"  path: {path}", summary)
+
+    if report["skipped"]:
+        print(f"\nSkipped {len(report['skipped'])} questions (expected files not indexed):")
+        for item in report["skipped"]:
+            print(f"  {item['query']}  ->  {', '.join(item['files'])}")
+
+
+def main(argv=None):
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m rag.eval",
+        description="Retrieval quality (recall@k, MRR) and latency, "
+                    "with structured lookup on and off"
+    )
+    parser.add_argument(
+        "--gold",
+        type=Path,
+        help='JSON lines file: {"query": "...", "files": ["docs/X.md"]}'
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=config.DEFAULT_TOP_K,
+        help=f"Results per query (default: {config.DEFAULT_TOP_K})"
+    )
+    parser.add_argument(
+        "--no-quick-reference",
+        action="store_true",
+        help="Only evaluate the gold file, not the Quick Reference questions"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Output as JSON (includes per-query rows)"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.no_quick_reference and args.gold is None:
+        print("Error: Nothing to evaluate (--no-quick-reference without --gold)")
+        sys.exit(1)
+    if args.gold is not None and not args.gold.exists():
+        print(f"Error: Gold file not found: {args.gold}")
+        sys.exit(1)
+    if not config.SHARDS and not config.INDEX_FILE.exists():
+        print("Error: RAG index not found")
+        print("Build index with: python -m rag.indexer")
+        sys.exit(1)
+
+    from .query import get_retriever
+    if args.json:
+        # Keep stdout for the report
+        with contextlib.redirect_stdout(sys.stderr):
+            retriever = get_retriever()
+    else:
+        retriever = get_retriever()
+
+    report = run_eval(retriever, args.gold, args.top, not args.no_quick_reference)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,34 @@
 """Build RAG index from scratch by reading, chunking, embedding, and storing."""
 import json
+import os
+import shutil
 import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from . import config
+from . import profiling
 from .metadata import parse_core_doc_index, extract_file_metadata, parse_quick_reference_table
 from .chunker import chunk_markdown_file, Chunk
-
-# Optional dependencies (graceful fallback)
+from .chunk_store import write_chunk_store
+from .bm25 import BM25Index, tokenize, bm25_document
+from .precision_filter import PrecisionIndex
+from .ann import IVFIndex
+from .shards import shard_dir, in_shard
+
+# Optional dependencies (graceful fallback). The encoder backend is only
+# imported when embedding starts (see encoders.py), so --help stays fast.
 try:
-    from sentence_transformers import SentenceTransformer
     import numpy as np
-    HAS_EMBEDDINGS = True
+    HAS_NUMPY = True
 except ImportError:
-    HAS_EMBEDDINGS = False
-    SentenceTransformer = None
+    HAS_NUMPY = False
     np = None
 
+from .encoders import Encoder, backend_available, load_encoder, new_generation, write_manifest
+
 try:
     from tqdm import tqdm
     HAS_TQDM = True
@@ -30,36 +39,55 @@ except ImportError:
 
 def build_index(
     docs_root: Path = config.DOCS_ROOT,
-    force_rebuild: bool = False
+    force_rebuild: bool = False,
+    shard: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Build RAG index from all markdown files in docs/.
 
+    With `shard`, only files under that shard's path prefixes
+    (config.SHARDS) are indexed, into SHARDS_DIR/<shard>. Other shards
+    are left as they are.
+
     Process:
         1. Check if index exists (skip if force_rebuild=False)
         2. Load CORE_DOCUMENTATION_INDEX metadata
         3. Discover all .md files recursively
         4. For each file: chunk at heading boundaries, extract metadata, embed
-        5. Write index.jsonl + embeddings.npy
+        5. Write chunk store + embeddings.npy + BM25 and precision indexes
         6. Build Quick Reference index
         7. Log build stats
 
+    Args:
+        docs_root: Root directory to scan for markdown files
+        force_rebuild: Rebuild even if the index exists
+        shard: Optional shard name from config.SHARDS
+
     Returns:
         Build stats dict
     """
-    if not HAS_EMBEDDINGS:
-        print("Error: sentence-transformers required for indexing")
+    if not HAS_NUMPY or not backend_available():
+        print(f"Error: numpy and the '{config.EMBEDDING_BACKEND}' embedding backend required for indexing")
         print("Install with: pip install sentence-transformers numpy")
         sys.exit(1)
 
+    if shard is not None and shard not in config.SHARDS:
+        print(f"Error: Unknown shard: {shard}")
+        print(f"Configured shards: {', '.join(config.SHARDS) or '(none)'}")
+        sys.exit(1)
+
+    output_dir = shard_dir(shard) if shard else config.OUTPUT_DIR
+    index_file = output_dir / config.INDEX_FILE.name
+
     config.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
-    if config.INDEX_FILE.exists() and not force_rebuild:
-        print(f"Index already exists at {config.INDEX_FILE}")
+    if index_file.exists() and not force_rebuild:
+        print(f"Index already exists at {index_file}")
         print("Use --force to rebuild")
         return {}
 
-    print("Building RAG index...")
+    print(f"Building RAG index{f' (shard: {shard})' if shard else ''}...")
     start_time = time.time()
 
     # Load CORE_DOCUMENTATION_INDEX metadata
@@ -85,6 +113,9 @@ def build_index(
             excluded_count += 1
             continue
 
+        if shard and not in_shard(rel_path, shard):
+            continue
+
         md_files.append(f)
 
     print(f"  Found {len(md_files)} files ({excluded_count} excluded)")
@@ -126,15 +157,17 @@ def build_index(
 
     # Embed all chunks
     print("Generating embeddings...")
-    embeddings = embed_chunks(all_chunks, model_name=config.EMBEDDING_MODEL)
+    print(f"Loading embedding model: {config.EMBEDDING_MODEL} ({config.EMBEDDING_BACKEND})...")
+    encoder = load_encoder()
+    embeddings = embed_chunks(all_chunks, encoder)
     print(f"  Generated {embeddings.shape[0]} embeddings ({embeddings.shape[1]}-dim)")
 
     # Write index and embeddings
-    print(f"Writing index to {config.INDEX_FILE}...")
-    write_index(all_chunks, embeddings)
+    print(f"Writing index to {index_file}...")
+    write_index(all_chunks, embeddings, encoder, output_dir)
 
     # Build Quick Reference index
-    qr_count = build_quick_reference_index(model_name=config.EMBEDDING_MODEL)
+    qr_count = build_quick_reference_index(encoder)
 
     # Calculate stats
     build_time = time.time() - start_time
@@ -147,9 +180,12 @@ def build_index(
         "avg_chunk_lines": round(avg_chunk_lines, 1),
         "build_time_seconds": round(build_time, 1),
         "model": config.EMBEDDING_MODEL,
-        "embedding_dim": config.EMBEDDING_DIM,
+        "backend": encoder.identity,
+        "embedding_dim": encoder.dim,
         "quick_reference_questions": qr_count
     }
+    if shard:
+        stats["shard"] = shard
 
     log_build_event(stats)
 
@@ -164,21 +200,16 @@ def build_index(
 
 def embed_chunks(
     chunks: List[Chunk],
-    model_name: str = config.EMBEDDING_MODEL
+    encoder: Optional[Encoder] = None
 ):
     """
-    Generate embeddings for chunks using sentence-transformers.
+    Generate embeddings for chunks with the configured encoder backend.
 
     Embeds heading_text + first 500 chars of content.
     Normalizes vectors (L2 norm) for cosine similarity.
     """
-    print(f"Loading embedding model: {model_name}...")
-    try:
-        model = SentenceTransformer(model_name)
-    except Exception as e:
-        print(f"Error loading model: {e}")
-        print("If model download failed, check internet connection")
-        sys.exit(1)
+    if encoder is None:
+        encoder = load_encoder()
 
     texts = []
     for chunk in chunks:
@@ -187,31 +218,85 @@ def embed_chunks(
         texts.append(text)
 
     print("Encoding chunks...")
-    embeddings = model.encode(
+    embeddings = encoder.encode(
         texts,
         batch_size=32,
-        show_progress_bar=HAS_TQDM,
-        normalize_embeddings=True
+        show_progress_bar=HAS_TQDM
     )
 
     return embeddings
 
 
-def write_index(chunks: List[Chunk], embeddings):
-    """Write chunks and embeddings to index files."""
-    with open(config.INDEX_FILE, 'w', encoding='utf-8') as f:
-        for chunk, embedding in zip(chunks, embeddings):
-            chunk_dict = chunk.to_dict()
-            chunk_dict['embedding'] = embedding.tolist()
-            f.write(json.dumps(chunk_dict, ensure_ascii=False) + '\n')
+def save_embeddings(path: Path, embeddings):
+    """
+    Save an embedding matrix as a memory-mappable .npy file.
+
+    Stored as C-contiguous float32; the .npy header pads the data offset
+    to a 64-byte boundary, so np.load(mmap_mode="r") maps rows aligned.
 
-    np.save(config.EMBEDDINGS_FILE, embeddings)
+    Written to a temp file and renamed into place: truncating a file that
+    a running retriever has mapped would invalidate its pages.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(embeddings, dtype=np.float32))
+    os.replace(tmp_path, path)
 
-    print(f"  Wrote {len(chunks)} chunks to {config.INDEX_FILE}")
-    print(f"  Wrote embeddings to {config.EMBEDDINGS_FILE}")
 
+def write_index(
+    chunks: List[Chunk],
+    embeddings,
+    encoder: Encoder,
+    output_dir: Path = config.OUTPUT_DIR
+):
+    """
+    Write chunk store, embeddings.npy, the precomputed search indexes and
+    the manifest recording which encoder produced the embeddings.
 
-def build_quick_reference_index(model_name: str = config.EMBEDDING_MODEL):
+    Artifacts use the file names from config, placed in output_dir
+    (OUTPUT_DIR for the main index, SHARDS_DIR/<name> for a shard).
+    """
+    index_file = output_dir / config.INDEX_FILE.name
+    embeddings_file = output_dir / config.EMBEDDINGS_FILE.name
+    bm25_dir = output_dir / config.BM25_DIR.name
+    precision_dir = output_dir / config.PRECISION_DIR.name
+    ann_dir = output_dir / config.ANN_DIR.name
+
+    chunk_dicts = [chunk.to_dict() for chunk in chunks]
+    write_chunk_store(chunk_dicts, index_file)
+    save_embeddings(embeddings_file, embeddings)
+
+    # Derived indexes record the build's generation, so one left over from
+    # another build of the same size is not mistaken for this one's
+    generation = new_generation()
+
+    bm25 = BM25Index.build([tokenize(bm25_document(c)) for c in chunk_dicts])
+    bm25.save(bm25_dir, generation)
+
+    precision_index = PrecisionIndex.build(chunk_dicts)
+    precision_index.save(precision_dir, generation)
+
+    ann_index = None
+    if config.ENABLE_ANN and len(chunk_dicts) >= config.ANN_MIN_CHUNKS:
+        print("  Training ANN index...")
+        ann_index = IVFIndex.build(embeddings)
+        ann_index.save(ann_dir, generation)
+    elif ann_dir.exists():
+        # An index from an earlier build would cluster other embeddings
+        shutil.rmtree(ann_dir)
+
+    write_manifest(index_file, encoder, len(chunk_dicts), generation)
+
+    print(f"  Wrote {len(chunks)} chunks to {index_file}")
+    print(f"  Wrote embeddings to {embeddings_file}")
+    print(f"  Wrote BM25 index ({len(bm25.terms)} terms) to {bm25_dir}")
+    print(f"  Wrote precision index ({len(precision_index.text.terms)} terms) to {precision_dir}")
+    if ann_index is not None:
+        print(f"  Wrote ANN index ({ann_index.n_lists} lists) to {ann_dir}")
+    print(f"  Wrote manifest ({encoder.identity}, {encoder.dim}-dim)")
+
+
+def build_quick_reference_index(encoder: Optional[Encoder] = None):
     """
     Build Quick Reference index by embedding questions from CORE_DOCUMENTATION_INDEX.
 
@@ -229,17 +314,17 @@ def build_quick_reference_index(model_name: str = config.EMBEDDING_MODEL):
 
     print(f"  Found {len(qr_entries)} Quick Reference entries")
 
-    print(f"  Loading embedding model: {model_name}...")
-    model = SentenceTransformer(model_name)
+    if encoder is None:
+        print(f"  Loading embedding model: {config.EMBEDDING_MODEL}...")
+        encoder = load_encoder()
 
     questions = [q for q, _ in qr_entries]
 
     print("  Encoding questions...")
-    embeddings = model.encode(
+    embeddings = encoder.encode(
         questions,
         batch_size=32,
-        show_progress_bar=HAS_TQDM,
-        normalize_embeddings=True
+        show_progress_bar=HAS_TQDM
     )
 
     quick_ref_index = []
@@ -253,7 +338,7 @@ def build_quick_reference_index(model_name: str = config.EMBEDDING_MODEL):
     with open(config.QUICK_REFERENCE_INDEX_FILE, 'w', encoding='utf-8') as f:
         json.dump(quick_ref_index, f, ensure_ascii=False, indent=2)
 
-    np.save(config.QUICK_REFERENCE_EMBEDDINGS_FILE, embeddings)
+    save_embeddings(config.QUICK_REFERENCE_EMBEDDINGS_FILE, embeddings)
 
     print(f"  Wrote Quick Reference index ({len(qr_entries)} questions)")
 
@@ -288,10 +373,24 @@ def main():
         default=config.DOCS_ROOT,
         help="Root directory for docs (default: docs/)"
     )
+    parser.add_argument(
+        "--shard",
+        help="Build only this shard (see config.SHARDS)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Write cProfile profiles of the build and the model load to "
+             f"{config.PROFILE_DIR}/ and print the hottest functions to stderr"
+    )
 
     args = parser.parse_args()
 
-    build_index(docs_root=args.docs_root, force_rebuild=args.force)
+    profiler = profiling.start("index") if args.profile else None
+    with profiling.phase("build"):
+        build_index(docs_root=args.docs_root, force_rebuild=args.force, shard=args.shard)
+    if profiler is not None:
+        profiler.finish()
 
 
 if __name__ == "__main__":
@@ -9,8 +9,13 @@ CUSTOMIZE: Edit ABBREVIATION_MAP and QUERY_TYPE_PATTERNS for your project's
 domain-specific terms and document structure.
 """
 import re
+from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
+import numpy as np
+
+from .arrays import save_arrays, load_arrays, load_meta
+
 
 # =============================================================================
 # Stopwords
@@ -283,3 +288,222 @@ def filter_chunks_by_precision(
             candidate_indices.append(i)
 
     return candidate_indices
+
+
+# =============================================================================
+# Precomputed Keyword Index
+# =============================================================================
+# filter_chunks_by_precision() lowercases and scans every chunk on every
+# query. PrecisionIndex answers the same question from postings built once
+# at index time, plus exclusion/navigation masks computed from source paths.
+#
+# Keywords only contain [a-z0-9.], so "kw in text" holds exactly when kw is
+# a substring of one maximal run of those characters in the text. The index
+# stores each chunk's runs; a keyword is resolved by searching the (much
+# smaller) run vocabulary and unioning the postings of the runs it hits.
+
+KEYWORD_RUN_PATTERN = r"[a-z0-9.]+"
+PRECISION_INDEX_VERSION = 1
+
+_HEADING_BRACKETS = r"[\[\]()]"
+
+
+class _RunPostings:
+    """Run vocabulary -> sorted chunk ids, with substring keyword lookup."""
+
+    def __init__(self, terms, ptr, docs):
+        self.terms = terms
+        self.ptr = ptr
+        self.docs = docs
+        term_list = terms.tolist()
+        self._blob = "\n".join(term_list)
+        lengths = np.fromiter((len(t) + 1 for t in term_list), dtype=np.int64, count=len(term_list))
+        self._starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(term_list) else lengths
+        self._cache: Dict[str, "np.ndarray"] = {}
+
+    @classmethod
+    def build(cls, run_sets: List[Set[str]]) -> "_RunPostings":
+        postings: Dict[str, List[int]] = {}
+        for doc_id, runs in enumerate(run_sets):
+            for run in runs:
+                postings.setdefault(run, []).append(doc_id)
+
+        terms = sorted(postings)
+        ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        ptr[1:] = np.cumsum([len(postings[t]) for t in terms])
+        docs = np.array([d for t in terms for d in postings[t]], dtype=np.int32)
+        return cls(np.array(terms, dtype=str), ptr, docs)
+
+    def docs_containing(self, keyword: str):
+        """Sorted chunk ids whose runs contain keyword as a substring."""
+        cached = self._cache.get(keyword)
+        if cached is not None:
+            return cached
+
+        positions = [m.start() for m in re.finditer(re.escape(keyword), self._blob)]
+        if positions:
+            term_ids = np.unique(np.searchsorted(self._starts, positions, side="right") - 1)
+            docs = np.unique(np.concatenate([
+                self.docs[self.ptr[t]:self.ptr[t + 1]] for t in term_ids
+            ]))
+        else:
+            docs = np.zeros(0, dtype=np.int32)
+
+        # Single dict operations: concurrent queries may both compute a
+        # keyword, but never see a partial entry
+        if len(self._cache) >= 4096:
+            self._cache.clear()
+        self._cache[keyword] = docs
+        return docs
+
+
+class PrecisionIndex:
+    """
+    Prebuilt equivalent of filter_chunks_by_precision().
+
+    Built by rag.indexer (build() + save()) and loaded by the retriever.
+    Exclusion and navigation masks are derived from source paths at load,
+    so edits to EXCLUDED_PATTERNS / NAVIGATION_DOCS apply without a rebuild.
+    """
+
+    def __init__(self, text: _RunPostings, heading: _RunPostings, source_files: List[str]):
+        self.text = text
+        self.heading = heading
+        self.num_chunks = len(source_files)
+
+        self.sources = sorted(set(source_files))
+        source_ids = {source: i for i, source in enumerate(self.sources)}
+        self.source_ids = np.array([source_ids[s] for s in source_files], dtype=np.int32)
+
+        excluded = np.array([
+            any(re.search(pattern, source) for pattern in EXCLUDED_PATTERNS)
+            for source in self.sources
+        ], dtype=bool)
+        navigation = np.array([
+            any(nav_doc in source for nav_doc in NAVIGATION_DOCS)
+            for source in self.sources
+        ], dtype=bool)
+        self.excluded_mask = excluded[self.source_ids] if self.num_chunks else np.zeros(0, dtype=bool)
+        self.navigation_mask = navigation[self.source_ids] if self.num_chunks else np.zeros(0, dtype=bool)
+
+    @classmethod
+    def build(cls, chunks) -> "PrecisionIndex":
+        """Build from full chunk dicts (with content)."""
+        text_runs = []
+        heading_runs = []
+        source_files = []
+        for chunk in chunks:
+            content = chunk.get('content', '').lower()
+            heading = chunk.get('heading_text', '').lower()
+            normalized_heading = re.sub(_HEADING_BRACKETS, '', heading)
+
+            text_runs.append(set(re.findall(KEYWORD_RUN_PATTERN, content + ' ' + heading)))
+            heading_runs.append(
+                set(re.findall(KEYWORD_RUN_PATTERN, heading))
+                | set(re.findall(KEYWORD_RUN_PATTERN, normalized_heading))
+            )
+            source_files.append(chunk.get('source_file', ''))
+
+        return cls(_RunPostings.build(text_runs), _RunPostings.build(heading_runs), source_files)
+
+    def save(self, directory: Path, generation: Optional[str] = None):
+        """Persist the postings, tagged with the generation of the build they belong to."""
+        save_arrays(
+            directory,
+            {
+                "text_terms": self.text.terms,
+                "text_ptr": self.text.ptr,
+                "text_docs": self.text.docs,
+                "heading_terms": self.heading.terms,
+                "heading_ptr": self.heading.ptr,
+                "heading_docs": self.heading.docs,
+            },
+            {
+                "version": PRECISION_INDEX_VERSION,
+                "run_pattern": KEYWORD_RUN_PATTERN,
+                "num_chunks": self.num_chunks,
+                "generation": generation,
+            }
+        )
+
+    @classmethod
+    def load(
+        cls,
+        directory: Path,
+        source_files: List[str],
+        generation: Optional[str] = None
+    ) -> Optional["PrecisionIndex"]:
+        """
+        Load a persisted index, or None if missing or built differently.
+
+        Args:
+            directory: Precision index directory
+            source_files: Source file of each chunk in the loaded index
+            generation: Manifest generation of the loaded index; postings
+                saved by another build are rejected even if the size matches
+        """
+        meta = load_meta(directory)
+        if meta is None:
+            return None
+        if (meta.get("version") != PRECISION_INDEX_VERSION
+                or meta.get("run_pattern") != KEYWORD_RUN_PATTERN
+                or meta.get("num_chunks") != len(source_files)
+                or meta.get("generation") != generation):
+            return None
+
+        arrays, _ = load_arrays(directory, (
+            "text_terms", "text_ptr", "text_docs",
+            "heading_terms", "heading_ptr", "heading_docs",
+        ))
+        return cls(
+            _RunPostings(arrays["text_terms"], arrays["text_ptr"], arrays["text_docs"]),
+            _RunPostings(arrays["heading_terms"], arrays["heading_ptr"], arrays["heading_docs"]),
+            source_files
+        )
+
+    @staticmethod
+    def supports(query_keywords: Set[str]) -> bool:
+        """True if every keyword is made of indexed characters."""
+        return all(re.fullmatch(KEYWORD_RUN_PATTERN, kw) or kw == '' for kw in query_keywords)
+
+    def filter(
+        self,
+        query_keywords: Set[str],
+        query_type: str,
+        canonical_file: Optional[str] = None,
+        suppress_navigation: bool = True,
+        min_keyword_overlap: float = 0.3
+    ) -> List[int]:
+        """Same result as filter_chunks_by_precision() over the indexed chunks."""
+        keyword_hits = np.zeros(self.num_chunks, dtype=np.int32)
+        for kw in query_keywords:
+            if kw == '':
+                keyword_hits += 1
+            else:
+                keyword_hits[self.text.docs_containing(kw)] += 1
+
+        min_keywords = max(1, len(query_keywords) * min_keyword_overlap)
+        keep = keyword_hits >= min_keywords
+
+        if canonical_file:
+            canonical_sources = np.array(
+                [canonical_file in source for source in self.sources], dtype=bool
+            )
+            keep |= canonical_sources[self.source_ids]
+
+        keep &= ~self.excluded_mask
+        if suppress_navigation and query_type in CONCEPT_QUERY_TYPES:
+            keep &= ~self.navigation_mask
+
+        return np.flatnonzero(keep).tolist()
+
+    def heading_hits(self, query_keywords: Set[str], indices: List[int]):
+        """Number of keywords found in each candidate's heading."""
+        indices = np.asarray(indices, dtype=np.int64)
+        hits = np.zeros(len(indices), dtype=np.int32)
+        for kw in query_keywords:
+            if kw == '':
+                hits += 1
+            else:
+                hits += np.isin(indices, self.heading.docs_containing(kw))
+        return hits
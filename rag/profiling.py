@@ -0,0 +1,114 @@
+"""Function-level profiles of a CLI run (`--profile` on rag.query and rag.indexer).
+
+A run is split into phases, each with its own cProfile profile saved as
+PROFILE_DIR/<command>-<timestamp>-<phase>.prof (pstats format: snakeviz,
+tuna, flameprof and gprof2dot read it; `python -m pstats FILE` browses it).
+A top-N summary of the hottest functions per phase goes to stderr.
+
+Phases nest: while an inner phase runs, the outer one is paused, so its
+profile and time exclude the inner work. load_encoder() runs in a
+"load_model" phase, which keeps model import and load out of the query
+and build profiles wherever they happen.
+
+cProfile follows the thread that started it; work on pool threads (shard
+fan-out, async executors) is not captured.
+"""
+import cProfile
+import pstats
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import config
+
+_active: Optional["Profiler"] = None
+
+
+class Profiler:
+    """Per-phase cProfile profiles for one command run."""
+
+    def __init__(self, command: str, output_dir: Optional[Path] = None, top_n: Optional[int] = None):
+        self.command = command
+        self.output_dir = Path(output_dir or config.PROFILE_DIR)
+        self.top_n = top_n or config.PROFILE_TOP_N
+        self.stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.seconds: Dict[str, float] = {}
+        self._stack: List[str] = []
+        self._resumed_at = 0.0
+
+    def _pause(self, name: str):
+        self.profiles[name].disable()
+        self.seconds[name] += time.perf_counter() - self._resumed_at
+
+    def _resume(self, name: str):
+        self._resumed_at = time.perf_counter()
+        self.profiles[name].enable()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Profile the enclosed block as phase `name` (repeats accumulate)."""
+        if name not in self.profiles:
+            self.profiles[name] = cProfile.Profile()
+            self.seconds[name] = 0.0
+        if self._stack:
+            self._pause(self._stack[-1])
+        self._stack.append(name)
+        self._resume(name)
+        try:
+            yield
+        finally:
+            self._pause(name)
+            self._stack.pop()
+            if self._stack:
+                self._resume(self._stack[-1])
+
+    def save(self) -> Dict[str, Path]:
+        """Write one .prof file per phase."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        paths = {}
+        for name, profile in self.profiles.items():
+            path = self.output_dir / f"{self.command}-{self.stamp}-{name}.prof"
+            profile.dump_stats(str(path))
+            paths[name] = path
+        return paths
+
+    def print_summary(self, paths: Dict[str, Path], file=sys.stderr):
+        """Print each phase's time, profile path and hottest functions by own time."""
+        for name, profile in self.profiles.items():
+            print(f"\nProfile '{name}': {self.seconds[name] * 1000:.1f} ms -> {paths[name]}", file=file)
+            entries = pstats.Stats(profile).stats
+            hottest = sorted(entries.items(), key=lambda item: item[1][2], reverse=True)[:self.top_n]
+            print(f"  {'calls':>9}  {'own ms':>9}  {'cum ms':>9}  function", file=file)
+            for (filename, line, function), (_, calls, own, cumulative, _) in hottest:
+                location = f"{Path(filename).name}:{line}" if line else filename
+                print(
+                    f"  {calls:>9}  {own * 1000:>9.1f}  {cumulative * 1000:>9.1f}  "
+                    f"{function} ({location})",
+                    file=file
+                )
+
+    def finish(self):
+        """Stop profiling, save the profiles and print the summary."""
+        global _active
+
+        if _active is self:
+            _active = None
+        self.print_summary(self.save())
+
+
+def start(command: str) -> Profiler:
+    """Start profiling this process; phase() blocks are recorded until finish()."""
+    global _active
+
+    _active = Profiler(command)
+    return _active
+
+
+def phase(name: str):
+    """Profile a block as phase `name` when profiling is active; otherwise a no-op."""
+    if _active is None:
+        return nullcontext()
+    return _active.phase(name)
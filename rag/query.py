@@ -1,11 +1,76 @@
 """CLI and programmatic query interface."""
 import argparse
+import asyncio
 import json
 import sys
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 
 from . import config
-from .retriever import RAGRetriever
+from . import profiling
+from . import startup
+from . import timings
+from .client import query_daemon
+from .encoders import manifest_path
+from .retriever import RAGRetriever, get_query_executor
+from .shards import ShardedRetriever, shard_files
+
+
+# Process-wide retriever shared by query_docs() and the daemon
+_retriever: Optional[Union[RAGRetriever, ShardedRetriever]] = None
+_retriever_signature: Optional[Tuple] = None
+_retriever_lock = threading.Lock()
+
+
+def _index_signature() -> Tuple:
+    """Fingerprint the on-disk index files (path, mtime, size)."""
+    paths = [
+        config.INDEX_FILE, config.EMBEDDINGS_FILE,
+        config.INDEX_MANIFEST_FILE, config.CORE_DOC_INDEX
+    ]
+    for name in config.SHARDS:
+        index_file, embeddings_file = shard_files(name)
+        paths.extend([index_file, embeddings_file, manifest_path(index_file)])
+
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((str(path), None, None))
+    return tuple(signature)
+
+
+def get_retriever() -> Union[RAGRetriever, ShardedRetriever]:
+    """
+    Return the process-wide retriever, loading it on first use.
+
+    With config.SHARDS set this is a ShardedRetriever over the shard
+    indexes; otherwise a RAGRetriever over the main index.
+
+    The retriever is rebuilt automatically when the index, embeddings,
+    index manifest, or CORE_DOCS_INDEX.md change on disk (e.g. after
+    python -m rag.indexer).
+    """
+    global _retriever, _retriever_signature
+
+    signature = _index_signature()
+    with _retriever_lock:
+        if _retriever is None or signature != _retriever_signature:
+            _retriever = ShardedRetriever() if config.SHARDS else RAGRetriever()
+            _retriever_signature = signature
+        return _retriever
+
+
+def reset():
+    """Drop the shared retriever so the next query reloads the index."""
+    global _retriever, _retriever_signature
+
+    with _retriever_lock:
+        _retriever = None
+        _retriever_signature = None
 
 
 def query_docs(
@@ -16,6 +81,9 @@ def query_docs(
     """
     Programmatic query interface.
 
+    Reuses one retriever per process (see get_retriever), so repeated calls
+    only pay the index and model load once.
+
     Usage:
         from rag.query import query_docs
         results = query_docs("How does authentication work?", top_k=3)
@@ -30,10 +98,75 @@ def query_docs(
     Returns:
         List of result dicts with chunks and scores
     """
-    retriever = RAGRetriever()
+    retriever = get_retriever()
     return retriever.query(query_text, top_k, filter_status)
 
 
+def iter_query_docs(
+    query_text: str,
+    top_k: int = config.DEFAULT_TOP_K,
+    filter_status: Optional[List[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming query_docs(): yields provisional rankings, then the final one.
+
+    Usage:
+        from rag import iter_query_docs
+        for update in iter_query_docs("How does authentication work?"):
+            show(update["stage"], update["results"])
+
+    Args:
+        query_text: Natural language query
+        top_k: Number of results to return
+        filter_status: Optional status filter (e.g., ["AUTHORITATIVE"])
+
+    Yields:
+        {"stage": "structured" | "lexical" | "final", "results": [...]};
+        the last is "final" and equals query_docs()
+    """
+    retriever = get_retriever()
+    yield from retriever.iter_query(query_text, top_k, filter_status)
+
+
+async def aquery_docs(
+    query_text: str,
+    top_k: int = config.DEFAULT_TOP_K,
+    filter_status: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Async query_docs() for asyncio services.
+
+    Loading the shared retriever (first call, or after a rebuild) and the
+    query itself run on the shared executor, so the event loop is never
+    blocked. Cancelling the caller's task stops the query between stages.
+
+    Usage:
+        from rag import aquery_docs
+        results = await aquery_docs("How does authentication work?", top_k=3)
+
+    Args:
+        query_text: Natural language query
+        top_k: Number of results to return
+        filter_status: Optional status filter (e.g., ["AUTHORITATIVE"])
+
+    Returns:
+        List of result dicts with chunks and scores
+    """
+    loop = asyncio.get_running_loop()
+    retriever = await loop.run_in_executor(get_query_executor(), get_retriever)
+    return await retriever.aquery(query_text, top_k, filter_status)
+
+
+def get_section(reference: str) -> Optional[Dict[str, Any]]:
+    """
+    Resolve a section reference (e.g. "CI_RULES.md \u00a7 Hard Rules") to its chunk.
+
+    Uses the shared retriever's lookup table, so following the references
+    collected in chunk["outgoing_references"] needs no search.
+    """
+    return get_retriever().get_section(reference)
+
+
 def print_results_table(results: List[Dict[str, Any]]):
     """Print results in human-readable format."""
     if not results:
@@ -61,6 +194,8 @@ def print_results_table(results: List[Dict[str, Any]]):
 
 def main():
     """CLI entry point."""
+    startup.record("import rag modules", time.perf_counter() - startup.PROCESS_START)
+
     parser = argparse.ArgumentParser(
         description="Query RAG documentation index",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -70,6 +205,12 @@ Examples:
   python -m rag.query "deployment procedure" --top 10
   python -m rag.query "API contracts" --filter AUTHORITATIVE
   python -m rag.query "error handling" --json
+  python -m rag.query "error handling" --no-daemon
+  python -m rag.query "deployment procedure" --timings
+  python -m rag.query "deployment procedure" --profile
+
+If a query daemon is running (python -m rag serve), queries are sent to it
+instead of loading the index in this process.
         """
     )
     parser.add_argument(
@@ -93,20 +234,62 @@ Examples:
         action="store_true",
         help="Output as JSON"
     )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Always load the index locally, even if a query daemon is running"
+    )
+    parser.add_argument(
+        "--startup-timings",
+        action="store_true",
+        help="Print import and index/model load times to stderr"
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print per-stage query times and candidate counts to stderr "
+             "(queries locally, bypassing the daemon and the result cache)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Write cProfile profiles of the index load, model load and query "
+             f"to {config.PROFILE_DIR}/ and print the hottest functions to stderr "
+             f"(queries locally, bypassing the daemon and the result cache)"
+    )
 
     args = parser.parse_args()
 
-    if not config.INDEX_FILE.exists():
+    if args.timings:
+        config.ENABLE_QUERY_TIMINGS = True
+    if args.timings or args.profile:
+        config.ENABLE_RESULT_CACHE = False
+
+    if not config.SHARDS and not config.INDEX_FILE.exists():
         print("Error: RAG index not found")
         print("Build index with: python -m rag.indexer")
         sys.exit(1)
 
+    profiler = profiling.start("query") if args.profile else None
+
     try:
-        results = query_docs(
-            args.query,
-            top_k=args.top,
-            filter_status=args.filter
-        )
+        results = None
+        if not args.no_daemon and not args.timings and not args.profile:
+            results = query_daemon(
+                args.query,
+                top_k=args.top,
+                filter_status=args.filter
+            )
+        if results is None:
+            with profiling.phase("load"):
+                get_retriever()
+            # The model loads on first encode, in its own "load_model" phase
+            with profiling.phase("query"):
+                results = query_docs(
+                    args.query,
+                    top_k=args.top,
+                    filter_status=args.filter
+                )
     except Exception as e:
         print(f"Error during query: {e}")
         sys.exit(1)
@@ -118,6 +301,13 @@ Examples:
         print(f"Top {args.top} results:\n")
         print_results_table(results)
 
+    if args.startup_timings:
+        startup.print_report()
+    if args.timings:
+        timings.print_stats(get_retriever().stats())
+    if profiler is not None:
+        profiler.finish()
+
 
 if __name__ == "__main__":
     main()
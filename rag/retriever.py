@@ -1,33 +1,203 @@
 """Hybrid semantic + keyword + authority retrieval engine."""
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
 import json
+import os
 import re
 import sys
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import date
 from pathlib import Path
-from typing import List, Dict, Any, Optional, TYPE_CHECKING
+from typing import List, Dict, Any, Iterator, Optional, Tuple, TYPE_CHECKING
 
 from . import config
-from .metadata import get_authority_boost, parse_canonical_sources_table
-
-# Optional dependencies
+from . import startup
+from .timings import NULL_TIMER, StageStats, new_timer
+from .cache import LRUCache, SQLiteStore, normalize_query
+from .chunk_store import ChunkStore
+from .chunker import extract_routing_target
+from .bm25 import BM25Index, tokenize, bm25_document
+from .metadata import (
+    authority_components,
+    authority_boost_vector,
+    parse_canonical_sources_table
+)
+
+# Optional dependencies. The encoder backend (sentence-transformers/torch,
+# ONNX Runtime) is imported when the embedding model is first needed.
 try:
-    from sentence_transformers import SentenceTransformer
     import numpy as np
-    HAS_EMBEDDINGS = True
+    HAS_NUMPY = True
 except ImportError:
-    HAS_EMBEDDINGS = False
+    HAS_NUMPY = False
     if not TYPE_CHECKING:
-        SentenceTransformer = None
         np = None
 
-try:
-    from rank_bm25 import BM25Okapi
-    HAS_BM25 = True
-except ImportError:
-    HAS_BM25 = False
-    if not TYPE_CHECKING:
-        BM25Okapi = None
+from .encoders import (
+    Encoder,
+    backend_available,
+    check_manifest,
+    encoder_identity,
+    load_encoder,
+    read_manifest
+)
+
+
+_query_embedding_cache: Optional[LRUCache] = None
+_result_cache: Optional[LRUCache] = None
+_result_cache_lock = threading.Lock()
+_query_executor: Optional[ThreadPoolExecutor] = None
+_query_executor_pid: Optional[int] = None
+_query_executor_lock = threading.Lock()
+_encoders: Dict[str, Encoder] = {}
+_encoders_lock = threading.Lock()
+
+
+def get_encoder() -> Encoder:
+    """
+    Return the process-wide encoder for the configured backend, loading it on first use.
+
+    Shared by every retriever in the process (e.g. all shards).
+    """
+    identity = encoder_identity()
+    with _encoders_lock:
+        encoder = _encoders.get(identity)
+        if encoder is None:
+            encoder = load_encoder()
+            _encoders[identity] = encoder
+        return encoder
+
+
+def get_query_embedding_cache() -> LRUCache:
+    """Return the process-wide query embedding cache, creating it on first use."""
+    global _query_embedding_cache
+
+    if _query_embedding_cache is None:
+        store = None
+        if config.ENABLE_QUERY_EMBEDDING_DISK_CACHE:
+            store = SQLiteStore(config.QUERY_EMBEDDING_CACHE_FILE, table="query_embeddings")
+        _query_embedding_cache = LRUCache(
+            maxsize=config.QUERY_EMBEDDING_CACHE_SIZE,
+            store=store,
+            encode=lambda embedding: embedding.astype(np.float32).tobytes(),
+            decode=lambda blob: np.frombuffer(blob, dtype=np.float32)
+        )
+    return _query_embedding_cache
+
+
+def get_result_cache() -> Optional[LRUCache]:
+    """Return the process-wide query result cache, or None if disabled.
+
+    Values are the JSON text of a result list, so every hit decodes a
+    private copy that callers may modify.
+    """
+    global _result_cache
+
+    if not config.ENABLE_RESULT_CACHE:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            store = None
+            if config.ENABLE_RESULT_DISK_CACHE:
+                store = SQLiteStore(config.RESULT_CACHE_FILE, table="query_results")
+            _result_cache = LRUCache(
+                maxsize=config.RESULT_CACHE_SIZE,
+                store=store,
+                encode=lambda text: text.encode("utf-8"),
+                decode=lambda blob: blob.decode("utf-8"),
+                ttl=config.RESULT_CACHE_TTL
+            )
+        return _result_cache
+
+
+def config_fingerprint() -> str:
+    """Hash of every setting in rag.config, so edits (even at runtime) miss the cache."""
+    settings = {name: value for name, value in vars(config).items() if name.isupper()}
+    blob = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def result_cache_key(
+    generation: str,
+    query_text: str,
+    top_k: int,
+    filter_status: Optional[List[str]],
+    enable_precision_filter: bool
+) -> str:
+    """
+    Result cache key for a query against one index generation.
+
+    Includes the config fingerprint, and today's date because authority
+    freshness decays by day.
+    """
+    return json.dumps([
+        generation,
+        config_fingerprint(),
+        date.today().toordinal(),
+        normalize_query(query_text),
+        top_k,
+        filter_status,
+        bool(enable_precision_filter)
+    ])
+
+
+def get_query_executor() -> ThreadPoolExecutor:
+    """Return the process-wide thread pool used by the async query API.
+
+    Recreated in a forked child, where the parent's worker threads do not exist.
+    """
+    global _query_executor, _query_executor_pid
+
+    with _query_executor_lock:
+        if _query_executor is None or _query_executor_pid != os.getpid():
+            _query_executor = ThreadPoolExecutor(
+                max_workers=config.ASYNC_MAX_WORKERS,
+                thread_name_prefix="rag-query"
+            )
+            _query_executor_pid = os.getpid()
+        return _query_executor
+
+
+async def run_stages(executor: Optional[Executor], embed, rank):
+    """
+    Run a query as two executor stages: embed(), then rank(embedding).
+
+    Each stage runs off the event loop. Cancelling the awaiting task
+    abandons the stage in flight and skips the ones not yet started, so a
+    request cancelled during encoding never reaches scoring.
+    """
+    loop = asyncio.get_running_loop()
+    executor = executor or get_query_executor()
+    query_embedding = await loop.run_in_executor(executor, embed)
+    return await loop.run_in_executor(executor, functools.partial(rank, query_embedding))
+
+
+def normalize_source_path(path: str) -> str:
+    """Normalize a source path for lookup ('./docs\\X.md' -> 'docs/X.md')."""
+    path = path.replace('\\', '/')
+    while path.startswith('./'):
+        path = path[2:]
+    return path
+
+
+def normalize_section_reference(reference: str) -> str:
+    """
+    Normalize a section reference for lookup.
+
+    Drops any directory from the file part, collapses whitespace, strips
+    trailing punctuation (as extract_section_references does) and
+    casefolds, so "docs/X.md \u00a7  Heading." and "X.md \u00a7 Heading" match.
+    """
+    file_part, sep, heading = reference.partition('\u00a7')
+    file_name = normalize_source_path(file_part.strip()).rsplit('/', 1)[-1]
+    if not sep:
+        return file_name.casefold()
+    heading = ' '.join(heading.split()).rstrip('.,;:')
+    return f"{file_name} \u00a7 {heading}".casefold()
 
 
 class RAGRetriever:
@@ -42,15 +212,32 @@ class RAGRetriever:
         1. Structured Lookup: Deterministic keyword matching (fast, precise)
         2. Phase A (Precision): Keyword extraction, classification, filtering
         3. Phase B (Reasoning): Semantic ranking of filtered candidates
+
+    Thread safety: query(), query_batch() and aquery() may be called
+    concurrently from any number of threads on one instance. The loaded
+    index is read-only; per-query state lives in locals; the shared caches
+    (query embeddings, authority vector, lookup memos) are either locked or
+    updated with single atomic assignments; the model loads once under a
+    lock and encoding is serialized inside the encoder where the backend
+    requires it. See python -m rag.bench throughput.
     """
 
     def __init__(
         self,
         index_file: Path = config.INDEX_FILE,
-        embeddings_file: Path = config.EMBEDDINGS_FILE
+        embeddings_file: Path = config.EMBEDDINGS_FILE,
+        model=None
     ):
-        if not HAS_EMBEDDINGS:
-            print("Error: sentence-transformers and numpy required")
+        """
+        Load an index. The embedding model is loaded on first use (see model).
+
+        Args:
+            index_file: Chunk metadata file (sibling artifacts are found next to it)
+            embeddings_file: Chunk embedding matrix
+            model: Already-loaded encoder to use instead of the shared one
+        """
+        if not HAS_NUMPY or not backend_available():
+            print(f"Error: numpy and the '{config.EMBEDDING_BACKEND}' embedding backend required")
             print("Install with: pip install sentence-transformers numpy")
             sys.exit(1)
 
@@ -65,27 +252,51 @@ class RAGRetriever:
             sys.exit(1)
 
         print("Loading RAG index...")
-        self.chunks = self._load_index(index_file)
-        self.embeddings = np.load(embeddings_file)
-        self.bm25 = self._build_bm25_index(self.chunks) if HAS_BM25 else None
-        self.model = self._load_model()
+        # self.chunks holds metadata only; content is read from the store
+        # for the chunks that need it (results, BM25 corpus)
+        with startup.phase("load chunk store"):
+            self.store = self._load_index(index_file)
+            self.chunks = self.store.meta
+        with startup.phase("load embeddings"):
+            self.embeddings = self._load_embeddings(embeddings_file)
+            manifest = self._check_manifest(index_file)
+            self.generation = self._index_generation(index_file, manifest)
+        with startup.phase("load BM25 index"):
+            self.bm25 = self._load_bm25_index(index_file, manifest)
+        with startup.phase("load precision index"):
+            self.precision_index = self._load_precision_index(index_file, manifest)
+        with startup.phase("load ANN index"):
+            self.ann_index = self._load_ann_index(embeddings_file, manifest)
+        with startup.phase("build lookup tables"):
+            self.authority_components = authority_components(self.chunks)
+            self._build_lookup_tables()
+        self._authority_cache = None
+        self._model = model
+        self._model_lock = threading.Lock()
+        self.embedding_cache = get_query_embedding_cache()
+        self.result_cache = get_result_cache()
+        self.query_timings = StageStats()
 
         # Load layered retrieval data
-        self.quick_ref_index = self._load_quick_reference()
-        self.canonical_sources = self._load_canonical_sources()
+        with startup.phase("load quick reference"):
+            self.quick_ref_embeddings = None
+            self.quick_ref_index = self._load_quick_reference()
+            self.canonical_sources = self._load_canonical_sources()
 
-        # Load structured lookup data
-        self.qr_entries = None
-        if config.ENABLE_STRUCTURED_LOOKUP:
-            from .metadata import parse_quick_reference_table
-            self.qr_entries = parse_quick_reference_table()
+            # Load structured lookup data
+            self.qr_entries = None
+            if config.ENABLE_STRUCTURED_LOOKUP:
+                from .metadata import parse_quick_reference_table
+                self.qr_entries = parse_quick_reference_table()
 
         print(f"  Loaded {len(self.chunks)} chunks")
         print(f"  Embeddings shape: {self.embeddings.shape}")
         if self.bm25:
             print(f"  BM25 index: ready")
         else:
-            print(f"  BM25 not available (install rank-bm25 for keyword search)")
+            print(f"  BM25 not available (keyword scores disabled)")
+        if self.ann_index is not None:
+            print(f"  ANN index: {self.ann_index.n_lists} lists (nprobe={config.ANN_NPROBE})")
         if self.quick_ref_index:
             print(f"  Quick Reference: {len(self.quick_ref_index)} questions")
         if self.canonical_sources:
@@ -93,6 +304,25 @@ class RAGRetriever:
         if self.qr_entries:
             print(f"  Structured Lookup: {len(self.qr_entries)} QR questions")
 
+    @property
+    def model(self) -> Encoder:
+        """Query encoder, loaded on first use.
+
+        Queries answered without embedding (empty queries, cached query
+        embeddings) never pay the backend import or model load.
+        """
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    encoder = get_encoder()
+                    if encoder.dim != self.embeddings.shape[1]:
+                        print(f"Error: Encoder produces {encoder.dim}-dim embeddings, "
+                              f"index has {self.embeddings.shape[1]}")
+                        print("Rebuild index with: python -m rag.indexer --force")
+                        sys.exit(1)
+                    self._model = encoder
+        return self._model
+
     def query(
         self,
         query_text: str,
@@ -112,151 +342,605 @@ class RAGRetriever:
         Returns:
             List of chunks with scores, sorted by final_score desc
         """
+        timer = new_timer()
+        with timer.stage("total"):
+            key = self._result_key(query_text, top_k, filter_status, enable_precision_filter)
+            results = None
+            if key is not None:
+                with timer.stage("result_cache"):
+                    results = self._cached_results(key)
+            if results is None:
+                results = self._query(
+                    query_text, top_k, filter_status, enable_precision_filter, timer=timer
+                )
+                self._store_results(key, results)
+        self.query_timings.record(timer)
+        return results
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Rolling latency percentiles per query stage.
+
+        Empty unless config.ENABLE_QUERY_TIMINGS is set. Stages a query
+        skipped (e.g. everything after a result cache hit) are not counted
+        for it.
+
+        Returns:
+            {stage: {"count", "p50_ms", "p95_ms", "p99_ms"[, "candidates_p50"]}}
+        """
+        return self.query_timings.summary()
+
+    def iter_query(
+        self,
+        query_text: str,
+        top_k: int = config.DEFAULT_TOP_K,
+        filter_status: Optional[List[str]] = None,
+        enable_precision_filter: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        query(), yielding provisional rankings as each stage completes.
+
+        Yields {"stage": ..., "results": [...]} dicts in pipeline order:
+            structured  Structured lookup hit, ranked within the matched
+                        files by BM25 + authority (before the model runs)
+            lexical     Precision-filter candidates ranked by BM25 +
+                        authority (before the model runs)
+            final       The fused ranking; always last, equal to query()
+
+        A query yields at most one of structured/lexical, and only "final"
+        when the result cache already holds the answer. Provisional results
+        have semantic_score 0.0, so their final_score is not comparable to
+        the final stage's.
+
+        Args:
+            query_text: Natural language query
+            top_k: Number of results to return
+            filter_status: Optional filter ["AUTHORITATIVE", "STABLE"]
+            enable_precision_filter: Enable Phase A precision pre-filter
+
+        Yields:
+            Stage dicts; the last has stage "final"
+        """
+        key = self._result_key(query_text, top_k, filter_status, enable_precision_filter)
+        cached = self._cached_results(key)
+        if cached is not None:
+            yield {"stage": "final", "results": cached}
+            return
+
+        # The per-term BM25 memo lets the final stage reuse the keyword
+        # scores computed for the provisional one
+        for stage, results in self._query_stages(
+            query_text, top_k, filter_status, enable_precision_filter,
+            term_scores={}, provisional=True
+        ):
+            if stage == "final":
+                self._store_results(key, results)
+            yield {"stage": stage, "results": results}
+
+    def _result_key(
+        self,
+        query_text: str,
+        top_k: int,
+        filter_status: Optional[List[str]],
+        enable_precision_filter: bool
+    ) -> Optional[str]:
+        """Result cache key, or None when the query should not be cached."""
+        if self.result_cache is None or not query_text:
+            return None
+        return result_cache_key(
+            self.generation, query_text, top_k, filter_status, enable_precision_filter
+        )
+
+    def _cached_results(self, key: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        if key is None:
+            return None
+        text = self.result_cache.get(key)
+        return json.loads(text) if text is not None else None
+
+    def _store_results(self, key: Optional[str], results: List[Dict[str, Any]]):
+        if key is not None:
+            self.result_cache.put(key, json.dumps(results, ensure_ascii=False))
+
+    async def aquery(
+        self,
+        query_text: str,
+        top_k: int = config.DEFAULT_TOP_K,
+        filter_status: Optional[List[str]] = None,
+        enable_precision_filter: bool = True,
+        executor: Optional[Executor] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async query(): same results, without blocking the event loop.
+
+        Encoding and scoring run as separate stages on `executor` (default:
+        the shared pool sized by config.ASYNC_MAX_WORKERS), so many
+        in-flight requests share this loaded index and cancellation takes
+        effect between stages.
+
+        Args:
+            query_text: Natural language query
+            top_k: Number of results to return
+            filter_status: Optional filter ["AUTHORITATIVE", "STABLE"]
+            enable_precision_filter: Enable Phase A precision pre-filter
+            executor: Optional executor for the CPU-bound stages
+
+        Returns:
+            List of chunks with scores, sorted by final_score desc
+        """
+        loop = asyncio.get_running_loop()
         if not query_text:
-            return self._top_authoritative(top_k)
+            return await loop.run_in_executor(
+                executor or get_query_executor(), self._top_authoritative, top_k
+            )
+
+        timer = new_timer()
+        key = self._result_key(query_text, top_k, filter_status, enable_precision_filter)
+
+        def lookup():
+            with timer.stage("result_cache"):
+                return self._cached_results(key)
+
+        def embed():
+            with timer.stage("embed"):
+                return self._embed_query(query_text)
+
+        def rank(query_embedding):
+            results = self._query(
+                query_text, top_k, filter_status, enable_precision_filter,
+                query_embedding=query_embedding, timer=timer
+            )
+            self._store_results(key, results)
+            return results
+
+        # "total" includes time spent waiting for the executor, as a
+        # caller of aquery() sees it
+        with timer.stage("total"):
+            results = None
+            if key is not None:
+                results = await loop.run_in_executor(executor or get_query_executor(), lookup)
+            if results is None:
+                results = await run_stages(executor, embed, rank)
+        self.query_timings.record(timer)
+        return results
+
+    def query_batch(
+        self,
+        query_texts: List[str],
+        top_k: int = config.DEFAULT_TOP_K,
+        filter_status: Optional[List[str]] = None,
+        enable_precision_filter: bool = True
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve top-k chunks for many queries at once.
+
+        Encodes all queries in one model call, scores them against the
+        corpus in a single matrix product, and shares per-term BM25 scores
+        across the batch. Each entry matches what query() would return up
+        to floating-point rounding: the matrix product and query()'s
+        per-query product can differ in the last bits (around 1e-8), so
+        scores may differ slightly and near-tied results can swap places.
+
+        Args:
+            query_texts: Natural language queries
+            top_k: Number of results to return per query
+            filter_status: Optional filter ["AUTHORITATIVE", "STABLE"]
+            enable_precision_filter: Enable Phase A precision pre-filter
+
+        Returns:
+            One result list per query, in input order
+        """
+        keys = {
+            text: self._result_key(text, top_k, filter_status, enable_precision_filter)
+            for text in dict.fromkeys(q for q in query_texts if q)
+        }
+        cached = {text: self.result_cache.get(key) for text, key in keys.items() if key}
+        unique_texts = [text for text in keys if cached.get(text) is None]
+
+        if unique_texts:
+            query_embeddings = self._embed_queries(unique_texts)
+            semantic_matrix = np.dot(self.embeddings, query_embeddings.T)
+        column = {text: i for i, text in enumerate(unique_texts)}
+        term_scores: Dict[str, Any] = {}
+
+        batch_results = []
+        for query_text in query_texts:
+            if not query_text:
+                batch_results.append(self._top_authoritative(top_k))
+                continue
+
+            if cached.get(query_text) is not None:
+                # Decode per occurrence so duplicate queries get separate lists
+                batch_results.append(json.loads(cached[query_text]))
+                continue
+
+            i = column[query_text]
+            timer = new_timer()
+            results = self._query(
+                query_text, top_k, filter_status, enable_precision_filter,
+                query_embedding=query_embeddings[i],
+                all_semantic_scores=semantic_matrix[:, i],
+                term_scores=term_scores,
+                timer=timer
+            )
+            self.query_timings.record(timer)
+            self._store_results(keys[query_text], results)
+            batch_results.append(results)
+
+        return batch_results
+
+    def _query(
+        self,
+        query_text: str,
+        top_k: int,
+        filter_status: Optional[List[str]],
+        enable_precision_filter: bool,
+        query_embedding=None,
+        all_semantic_scores=None,
+        term_scores: Optional[Dict[str, Any]] = None,
+        timer=NULL_TIMER
+    ) -> List[Dict[str, Any]]:
+        """
+        Query pipeline shared by query() and query_batch().
+
+        query_batch() passes the precomputed query embedding, the semantic
+        scores against every chunk, and a per-term BM25 memo shared across
+        the batch; query() computes them on demand. Stage durations and
+        candidate counts go to timer (see rag.timings).
+        """
+        for _, results in self._query_stages(
+            query_text, top_k, filter_status, enable_precision_filter,
+            query_embedding, all_semantic_scores, term_scores, timer=timer
+        ):
+            pass
+        return results
+
+    def _query_stages(
+        self,
+        query_text: str,
+        top_k: int,
+        filter_status: Optional[List[str]],
+        enable_precision_filter: bool,
+        query_embedding=None,
+        all_semantic_scores=None,
+        term_scores: Optional[Dict[str, Any]] = None,
+        provisional: bool = False,
+        timer=NULL_TIMER
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        The query pipeline as a generator of (stage, results).
+
+        Yields ("final", results) last. With provisional=True it first
+        yields the lexical ranking available before the query is embedded
+        ("structured" or "lexical"; see iter_query).
+        """
+        if not query_text:
+            yield "final", self._top_authoritative(top_k)
+            return
 
         # ========== STEP 1: STRUCTURED LOOKUP ==========
         if config.ENABLE_STRUCTURED_LOOKUP and self.qr_entries:
             from .structured_lookup import structured_lookup
 
-            match = structured_lookup(
-                query_text,
-                self.qr_entries,
-                self.canonical_sources or {}
-            )
+            with timer.stage("structured_lookup"):
+                match = structured_lookup(
+                    query_text,
+                    self.qr_entries,
+                    self.canonical_sources or {}
+                )
 
             if match.matched:
-                query_embedding = self._embed_query(query_text)
+                if provisional:
+                    results = self._get_chunks_from_files(
+                        match.file_paths, top_k, query_embedding, query_text,
+                        all_semantic_scores=all_semantic_scores,
+                        term_scores=term_scores
+                    )
+                    for r in results:
+                        r["lookup_method"] = match.match_type
+                        r["structured_confidence"] = match.confidence
+                    yield "structured", results
+
+                if query_embedding is None:
+                    with timer.stage("embed"):
+                        query_embedding = self._embed_query(query_text)
                 results = self._get_chunks_from_files(
                     match.file_paths,
                     top_k,
                     query_embedding,
-                    query_text
+                    query_text,
+                    all_semantic_scores=all_semantic_scores,
+                    term_scores=term_scores,
+                    timer=timer
                 )
                 for r in results:
                     r["lookup_method"] = match.match_type
                     r["structured_confidence"] = match.confidence
-                return results
+                yield "final", results
+                return
 
         # ========== STEP 2: BROAD SEARCH ==========
-        query_embedding = self._embed_query(query_text)
-
         # Try legacy Quick Reference if structured lookup disabled
         if not config.ENABLE_STRUCTURED_LOOKUP:
-            qr_files = self._check_quick_reference(query_text)
+            if query_embedding is None:
+                with timer.stage("embed"):
+                    query_embedding = self._embed_query(query_text)
+            with timer.stage("quick_reference"):
+                qr_files = self._check_quick_reference(query_text, query_embedding)
             if qr_files:
-                return self._get_chunks_from_files(qr_files, top_k, query_embedding, query_text)
+                yield "final", self._get_chunks_from_files(
+                    qr_files, top_k, query_embedding, query_text,
+                    all_semantic_scores=all_semantic_scores,
+                    term_scores=term_scores,
+                    timer=timer
+                )
+                return
 
         # ========== PHASE A: PRECISION PRE-FILTER ==========
-        if enable_precision_filter and config.ENABLE_PRECISION_FILTER:
-            from .precision_filter import (
-                expand_abbreviations,
-                extract_query_keywords,
-                classify_query_type,
-                filter_chunks_by_precision
-            )
+        with timer.stage("precision_filter"):
+            if enable_precision_filter and config.ENABLE_PRECISION_FILTER:
+                from .precision_filter import (
+                    expand_abbreviations,
+                    extract_query_keywords,
+                    classify_query_type,
+                    filter_chunks_by_precision
+                )
 
-            expanded_query = expand_abbreviations(query_text)
-            query_keywords = extract_query_keywords(expanded_query)
-            query_type, canonical_file = classify_query_type(expanded_query, query_keywords)
-
-            candidate_indices = filter_chunks_by_precision(
-                self.chunks,
-                query_keywords,
-                query_type,
-                canonical_file,
-                suppress_navigation=config.PRECISION_SUPPRESS_NAVIGATION,
-                min_keyword_overlap=config.PRECISION_MIN_KEYWORD_OVERLAP
+                expanded_query = expand_abbreviations(query_text)
+                query_keywords = extract_query_keywords(expanded_query)
+                query_type, canonical_file = classify_query_type(expanded_query, query_keywords)
+
+                if self.precision_index and self.precision_index.supports(query_keywords):
+                    candidate_indices = self.precision_index.filter(
+                        query_keywords,
+                        query_type,
+                        canonical_file,
+                        suppress_navigation=config.PRECISION_SUPPRESS_NAVIGATION,
+                        min_keyword_overlap=config.PRECISION_MIN_KEYWORD_OVERLAP
+                    )
+                else:
+                    candidate_indices = filter_chunks_by_precision(
+                        self.store,
+                        query_keywords,
+                        query_type,
+                        canonical_file,
+                        suppress_navigation=config.PRECISION_SUPPRESS_NAVIGATION,
+                        min_keyword_overlap=config.PRECISION_MIN_KEYWORD_OVERLAP
+                    )
+
+                if not candidate_indices:
+                    candidate_indices = list(range(len(self.chunks)))
+            else:
+                candidate_indices = list(range(len(self.chunks)))
+                expanded_query = query_text
+                query_keywords = set()
+                canonical_file = self._detect_canonical_concepts(query_text)
+        timer.size("precision_filter", len(candidate_indices))
+
+        precision_narrowed = len(candidate_indices) < len(self.chunks)
+        bm25_query = expanded_query if enable_precision_filter else query_text
+
+        if provisional:
+            # Same scoring with the semantic term left out
+            candidate_chunks = [self.chunks[i] for i in candidate_indices]
+            keyword_scores, authority_scores = self._lexical_scores(
+                candidate_indices, bm25_query, query_keywords, canonical_file,
+                enable_precision_filter, term_scores
+            )
+            semantic_scores = np.zeros(len(candidate_indices))
+            results = self._rank_and_format_subset(
+                config.KEYWORD_WEIGHT * keyword_scores +
+                config.AUTHORITY_WEIGHT * authority_scores,
+                semantic_scores, keyword_scores,
+                authority_scores, candidate_chunks, candidate_indices,
+                top_k, filter_status,
+                precision_filtered=enable_precision_filter
             )
+            yield "lexical", self._suppress_routing_docs(results)
 
-            if not candidate_indices:
-                candidate_indices = list(range(len(self.chunks)))
-        else:
-            candidate_indices = list(range(len(self.chunks)))
-            expanded_query = query_text
-            query_keywords = set()
-            canonical_file = self._detect_canonical_concepts(query_text)
+        if query_embedding is None:
+            with timer.stage("embed"):
+                query_embedding = self._embed_query(query_text)
+
+        # Scoring every chunk is the expensive case: shortlist with the ANN
+        # index when the precision filter did not narrow the candidates
+        if not precision_narrowed and self.ann_index is not None:
+            with timer.stage("ann"):
+                candidate_indices = self.ann_index.search(
+                    query_embedding, config.ANN_NPROBE
+                ).tolist()
+            timer.size("ann", len(candidate_indices))
 
         # ========== PHASE B: SEMANTIC RANKING ==========
-        candidate_chunks = [self.chunks[i] for i in candidate_indices]
-        candidate_embeddings = self.embeddings[candidate_indices]
+        with timer.stage("semantic"):
+            candidate_chunks = [self.chunks[i] for i in candidate_indices]
+
+            if all_semantic_scores is not None:
+                semantic_scores = all_semantic_scores[candidate_indices]
+            else:
+                candidate_embeddings = self.embeddings[candidate_indices]
+                semantic_scores = np.dot(candidate_embeddings, query_embedding)
+        with timer.stage("keyword"):
+            keyword_scores, authority_scores = self._lexical_scores(
+                candidate_indices, bm25_query, query_keywords, canonical_file,
+                enable_precision_filter, term_scores
+            )
+
+        # Combine scores
+        with timer.stage("scoring"):
+            if enable_precision_filter and precision_narrowed:
+                final_scores = (
+                    0.5 * semantic_scores +
+                    0.35 * keyword_scores +
+                    0.15 * authority_scores
+                )
+            else:
+                final_scores = (
+                    config.SEMANTIC_WEIGHT * semantic_scores +
+                    config.KEYWORD_WEIGHT * keyword_scores +
+                    config.AUTHORITY_WEIGHT * authority_scores
+                )
 
-        semantic_scores = np.dot(candidate_embeddings, query_embedding)
-        keyword_scores = self._keyword_search_subset(expanded_query if enable_precision_filter else query_text, candidate_indices)
+            results = self._rank_and_format_subset(
+                final_scores, semantic_scores, keyword_scores,
+                authority_scores, candidate_chunks, candidate_indices,
+                top_k, filter_status,
+                precision_filtered=enable_precision_filter
+            )
+        timer.size("scoring", len(results))
+
+        # Routing suppression
+        with timer.stage("routing_suppression"):
+            results = self._suppress_routing_docs(results)
+        timer.size("routing_suppression", len(results))
+
+        yield "final", results
+
+    def _lexical_scores(
+        self, candidate_indices: List[int], bm25_query: str, query_keywords: set,
+        canonical_file: Optional[str], enable_precision_filter: bool,
+        term_scores: Optional[Dict[str, Any]] = None
+    ):
+        """(keyword_scores, authority_scores) for the candidates, with boosts."""
+        keyword_scores = self._keyword_search_subset(
+            bm25_query, candidate_indices, term_scores=term_scores
+        )
 
         # Boost keywords in headings
         if enable_precision_filter and query_keywords:
             keyword_scores = self._boost_heading_matches(
-                candidate_chunks, query_keywords, keyword_scores
+                candidate_indices, query_keywords, keyword_scores
             )
 
-        authority_scores = self._authority_boost(candidate_chunks)
+        authority_scores = self._authority_boost(candidate_indices)
 
         # Apply canonical boost
         if canonical_file:
             authority_scores = self._apply_canonical_boost_subset(
-                authority_scores, canonical_file, candidate_chunks
+                authority_scores, canonical_file, candidate_indices
             )
 
-        # Combine scores
-        if enable_precision_filter and len(candidate_indices) < len(self.chunks):
-            final_scores = (
-                0.5 * semantic_scores +
-                0.35 * keyword_scores +
-                0.15 * authority_scores
-            )
+        return keyword_scores, authority_scores
+
+    def _load_index(self, index_file: Path) -> ChunkStore:
+        """Open the chunk store (metadata eagerly, content lazily)."""
+        try:
+            return ChunkStore(index_file)
+        except (OSError, ValueError) as e:
+            print(f"Error: Failed to load chunk store: {e}")
+            print("Rebuild index with: python -m rag.indexer --force")
+            sys.exit(1)
+
+    def _load_embeddings(self, embeddings_file: Path):
+        """Open an embedding matrix, memory-mapped when EMBEDDINGS_MMAP is set."""
+        mmap_mode = "r" if config.EMBEDDINGS_MMAP else None
+        return np.load(embeddings_file, mmap_mode=mmap_mode)
+
+    def _check_manifest(self, index_file: Path) -> Optional[Dict[str, Any]]:
+        """Refuse an index built with a different embedding backend; returns the manifest."""
+        try:
+            manifest = read_manifest(index_file)
+        except (OSError, ValueError) as e:
+            print(f"Error: Failed to read index manifest: {e}")
+            print("Rebuild index with: python -m rag.indexer --force")
+            sys.exit(1)
+
+        mismatch = check_manifest(manifest, self.embeddings.shape[1])
+        if mismatch:
+            print(f"Error: Embedding backend mismatch: {mismatch}")
+            print("Rebuild index with: python -m rag.indexer --force")
+            sys.exit(1)
+        return manifest
+
+    def _index_generation(self, index_file: Path, manifest: Optional[Dict[str, Any]]) -> str:
+        """
+        ID that changes whenever cached results could: each rebuild (manifest
+        generation, or the index file's mtime/size for older indexes) and
+        each edit of CORE_DOCS_INDEX.md (Quick Reference, Canonical Sources).
+        """
+        parts = []
+        if manifest and manifest.get("generation"):
+            parts.append(manifest["generation"])
         else:
-            final_scores = (
-                config.SEMANTIC_WEIGHT * semantic_scores +
-                config.KEYWORD_WEIGHT * keyword_scores +
-                config.AUTHORITY_WEIGHT * authority_scores
+            stat = Path(index_file).stat()
+            parts.append(f"{stat.st_mtime_ns}-{stat.st_size}")
+        try:
+            stat = config.CORE_DOC_INDEX.stat()
+            parts.append(f"{stat.st_mtime_ns}-{stat.st_size}")
+        except OSError:
+            pass
+        return ":".join(parts)
+
+    def _load_precision_index(self, index_file: Path, manifest: Optional[Dict[str, Any]]):
+        """Load the precomputed precision-filter index, rebuilding in memory if stale."""
+        if not config.ENABLE_PRECISION_FILTER:
+            return None
+
+        from .precision_filter import PrecisionIndex
+
+        precision_dir = Path(index_file).parent / config.PRECISION_DIR.name
+        source_files = [chunk.get('source_file', '') for chunk in self.chunks]
+        try:
+            index = PrecisionIndex.load(
+                precision_dir, source_files, (manifest or {}).get("generation")
             )
+        except (OSError, ValueError) as e:
+            print(f"Warning: Failed to load precision index: {e}")
+            index = None
 
-        results = self._rank_and_format_subset(
-            final_scores, semantic_scores, keyword_scores,
-            authority_scores, candidate_chunks, candidate_indices,
-            top_k, filter_status,
-            precision_filtered=enable_precision_filter
-        )
+        if index is not None:
+            return index
 
-        # Routing suppression
-        results = self._suppress_routing_docs(results)
+        print("  Precision index missing or stale; rebuilding in memory")
+        print("  (run python -m rag.indexer --force to persist it)")
+        return PrecisionIndex.build(self.store)
 
-        return results
+    def _load_ann_index(self, embeddings_file: Path, manifest: Optional[Dict[str, Any]]):
+        """Load the IVF index if it was built with these embeddings."""
+        if not config.ENABLE_ANN:
+            return None
 
-    def _load_index(self, index_file: Path) -> List[Dict]:
-        """Load chunks from index.jsonl."""
-        chunks = []
-        with open(index_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    chunk = json.loads(line)
-                    chunk.pop('embedding', None)
-                    chunks.append(chunk)
-                except json.JSONDecodeError:
-                    continue
-        return chunks
+        from .ann import IVFIndex
 
-    def _load_model(self):
-        """Load embedding model."""
+        ann_dir = Path(embeddings_file).parent / config.ANN_DIR.name
         try:
-            return SentenceTransformer(config.EMBEDDING_MODEL)
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            sys.exit(1)
-
-    def _build_bm25_index(self, chunks: List[Dict]):
-        """Build BM25 index from chunk content."""
-        if not HAS_BM25:
+            return IVFIndex.load(
+                ann_dir, len(self.chunks), self.embeddings.shape[1],
+                (manifest or {}).get("generation")
+            )
+        except (OSError, ValueError) as e:
+            print(f"Warning: Failed to load ANN index: {e}")
             return None
 
+    def _load_bm25_index(self, index_file: Path, manifest: Optional[Dict[str, Any]]):
+        """Load the precomputed BM25 index, rebuilding in memory if stale.
+
+        The persisted index is rejected when it was built with different
+        tokenizer rules, for a different corpus, or by another build.
+        """
+        bm25_dir = Path(index_file).parent / config.BM25_DIR.name
         try:
-            corpus = [
-                chunk["heading_text"] + " " + chunk["content"]
-                for chunk in chunks
-            ]
+            bm25 = BM25Index.load(
+                bm25_dir,
+                expected_docs=len(self.chunks),
+                generation=(manifest or {}).get("generation")
+            )
+        except (OSError, ValueError) as e:
+            print(f"Warning: Failed to load BM25 index: {e}")
+            bm25 = None
+
+        if bm25 is not None:
+            return bm25
+
+        print("  BM25 index missing or stale; rebuilding in memory")
+        print("  (run python -m rag.indexer --force to persist it)")
+        return self._build_bm25_index(self.store)
+
+    def _build_bm25_index(self, chunks):
+        """Build BM25 index from chunk content."""
+        try:
+            corpus = [bm25_document(chunk) for chunk in chunks]
             tokenized_corpus = [self._tokenize(doc) for doc in corpus]
-            return BM25Okapi(tokenized_corpus)
+            return BM25Index.build(tokenized_corpus)
         except Exception as e:
             print(f"Warning: BM25 index build failed: {e}")
             return None
@@ -274,9 +958,9 @@ class RAGRetriever:
                 qr_index = json.load(f)
 
             if config.QUICK_REFERENCE_EMBEDDINGS_FILE.exists():
-                qr_embeddings = np.load(config.QUICK_REFERENCE_EMBEDDINGS_FILE)
-                for i, entry in enumerate(qr_index):
-                    entry['embedding'] = qr_embeddings[i]
+                self.quick_ref_embeddings = self._load_embeddings(
+                    config.QUICK_REFERENCE_EMBEDDINGS_FILE
+                )
 
             return qr_index
 
@@ -296,26 +980,63 @@ class RAGRetriever:
             return None
 
     def _embed_query(self, query_text: str):
-        """Embed query text."""
-        try:
-            embedding = self.model.encode(
-                [query_text],
-                normalize_embeddings=True
-            )[0]
-            return embedding
-        except Exception as e:
-            print(f"Error embedding query: {e}")
-            return np.zeros(config.EMBEDDING_DIM)
+        """Embed query text (cached per model + normalized query)."""
+        return self._embed_queries([query_text])[0]
+
+    def _embed_queries(self, query_texts: List[str]):
+        """Embed several queries, encoding all cache misses in one model call."""
+        # An injected encoder keys on its own identity. Until the shared one
+        # loads, the configured identity stands in for it (they are equal),
+        # so cache hits never load the model
+        identity = self._model.identity if self._model is not None else encoder_identity()
+        cache_keys = [f"{identity}\n{normalize_query(text)}" for text in query_texts]
+        embeddings = [self.embedding_cache.get(key) for key in cache_keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missing:
+            try:
+                encoded = self.model.encode([query_texts[i] for i in missing])
+            except Exception as e:
+                print(f"Error embedding query: {e}")
+                encoded = None
+
+            for j, i in enumerate(missing):
+                if encoded is None:
+                    embeddings[i] = np.zeros(self.embeddings.shape[1], dtype=np.float32)
+                    continue
+                embedding = np.asarray(encoded[j], dtype=np.float32)
+                embedding.flags.writeable = False
+                self.embedding_cache.put(cache_keys[i], embedding)
+                embeddings[i] = embedding
 
-    def _keyword_search_subset(self, query_text: str, indices: List[int]):
-        """BM25 scoring for a subset of chunks."""
+        return np.vstack(embeddings)
+
+    def _keyword_search_subset(
+        self, query_text: str, indices: List[int],
+        term_scores: Optional[Dict[str, Any]] = None
+    ):
+        """BM25 scoring for a subset of chunks.
+
+        Only the candidate chunks are scored. When term_scores is given
+        (query_batch), per-term corpus scores are memoized there and summed,
+        so a term shared by several queries in a batch is scored once. BM25
+        is additive over query terms, so the result matches a direct
+        get_scores() call.
+        """
         if not self.bm25:
             return np.zeros(len(indices))
 
         try:
             query_tokens = self._tokenize(query_text)
-            all_scores = self.bm25.get_scores(query_tokens)
-            subset_scores = all_scores[indices]
+            if term_scores is None:
+                subset_scores = self.bm25.get_scores(query_tokens, indices)
+            else:
+                all_scores = np.zeros(len(self.chunks))
+                for token in query_tokens:
+                    if token not in term_scores:
+                        term_scores[token] = self.bm25.get_scores([token])
+                    all_scores += term_scores[token]
+                subset_scores = all_scores[indices]
 
             max_score = subset_scores.max() if subset_scores.max() > 0 else 1.0
             return subset_scores / max_score
@@ -324,40 +1045,93 @@ class RAGRetriever:
             print(f"Warning: BM25 subset search failed: {e}")
             return np.zeros(len(indices))
 
-    def _authority_boost(self, chunks: List[Dict]):
-        """Calculate authority boost with freshness decay."""
-        boosts = []
-        for chunk in chunks:
-            metadata = chunk.get("metadata", {})
-            status = metadata.get("status", "unmarked")
-            verified = metadata.get("verified", "unknown")
-            canonical = metadata.get("canonical", False)
-            boost = get_authority_boost(status, verified, canonical=canonical)
-            boosts.append(boost)
+    def get_section(self, reference: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a section reference to its chunk without searching.
+
+        Accepts the forms chunker.extract_section_references() collects,
+        e.g. "SITE_ARCHITECTURE.md \u00a7 Page Specs" or a path-qualified
+        "docs/technical/SITE_ARCHITECTURE.md \u00a7 Page Specs".
+
+        Returns:
+            Full chunk dict, or None if no chunk has that reference (e.g.
+            a small subsection merged into its parent)
+        """
+        idx = self.section_index.get(normalize_section_reference(reference))
+        return self.store.chunk(idx) if idx is not None else None
+
+    def _build_lookup_tables(self):
+        """Build source-file and section-reference maps over chunk metadata."""
+        self.file_chunks: Dict[str, List[int]] = {}
+        self.section_index: Dict[str, int] = {}
+
+        for i, chunk in enumerate(self.chunks):
+            source = normalize_source_path(chunk.get('source_file', ''))
+            self.file_chunks.setdefault(source, []).append(i)
+            self.section_index.setdefault(
+                normalize_section_reference(chunk.get('section_reference', '')), i
+            )
 
-        return np.array(boosts)
+        self.source_ids = {source: i for i, source in enumerate(self.file_chunks)}
+        self.chunk_source_ids = np.zeros(len(self.chunks), dtype=np.int32)
+        for source, indices in self.file_chunks.items():
+            self.chunk_source_ids[indices] = self.source_ids[source]
+        self._source_match_cache: Dict[str, List[str]] = {}
+
+    def _sources_matching(self, file_path: str) -> List[str]:
+        """Source files containing file_path (matches partial paths like 'CLAUDE.md')."""
+        file_path = normalize_source_path(file_path)
+        matches = self._source_match_cache.get(file_path)
+        if matches is None:
+            matches = [source for source in self.file_chunks if file_path in source]
+            self._source_match_cache[file_path] = matches
+        return matches
+
+    def _chunks_for_files(self, file_paths: List[str]) -> List[int]:
+        """Chunk indices (ascending) belonging to any of file_paths."""
+        sources = {source for fp in file_paths for source in self._sources_matching(fp)}
+        if len(sources) == 1:
+            return list(self.file_chunks[sources.pop()])
+        return sorted(i for source in sources for i in self.file_chunks[source])
+
+    def _authority_vector(self):
+        """Authority boost for every chunk, recomputed when the day changes.
+
+        The (day, vector) pair is swapped in with one assignment, so
+        concurrent queries see either the old or the new vector, never a mix.
+        """
+        today = date.today().toordinal()
+        cached = self._authority_cache
+        if cached is None or cached[0] != today:
+            vector = authority_boost_vector(*self.authority_components, today)
+            cached = (today, vector)
+            self._authority_cache = cached
+        return cached[1]
+
+    def _authority_boost(self, indices: List[int]):
+        """Calculate authority boost with freshness decay for chunk indices."""
+        return self._authority_vector()[indices]
 
     def _tokenize(self, text: str):
         """Tokenize text for BM25 with light normalization."""
-        text = text.lower()
-        return re.findall(r"[a-z0-9]+(?:\.[0-9]+)?", text)
+        return tokenize(text)
 
-    def _check_quick_reference(self, query_text: str) -> Optional[List[str]]:
+    def _check_quick_reference(
+        self, query_text: str, query_embedding=None
+    ) -> Optional[List[str]]:
         """Check if query matches Quick Reference questions (embedding-based)."""
         if not self.quick_ref_index or not config.ENABLE_QUICK_REFERENCE:
             return None
 
-        query_embedding = self._embed_query(query_text)
+        if query_embedding is None:
+            query_embedding = self._embed_query(query_text)
 
-        best_match_idx = -1
-        best_similarity = 0.0
+        if self.quick_ref_embeddings is None:
+            return None
 
-        for i, entry in enumerate(self.quick_ref_index):
-            if 'embedding' in entry:
-                similarity = np.dot(entry['embedding'], query_embedding)
-                if similarity > best_similarity:
-                    best_similarity = similarity
-                    best_match_idx = i
+        similarities = np.dot(self.quick_ref_embeddings, query_embedding)
+        best_match_idx = int(np.argmax(similarities))
+        best_similarity = similarities[best_match_idx]
 
         if best_similarity >= config.QUICK_REFERENCE_THRESHOLD:
             matched_file = self.quick_ref_index[best_match_idx]['file']
@@ -367,54 +1141,66 @@ class RAGRetriever:
 
     def _get_chunks_from_files(
         self, file_paths: List[str], top_k: int,
-        query_embedding, query_text: Optional[str] = None
+        query_embedding, query_text: Optional[str] = None,
+        all_semantic_scores=None,
+        term_scores: Optional[Dict[str, Any]] = None,
+        timer=NULL_TIMER
     ) -> List[Dict[str, Any]]:
-        """Get chunks from specific files and rank semantically within them."""
-        matching_indices = []
-        matching_chunks = []
+        """Get chunks from specific files and rank semantically within them.
 
-        for i, chunk in enumerate(self.chunks):
-            chunk_file = chunk.get('source_file', '')
-            if any(file_path in chunk_file for file_path in file_paths):
-                matching_indices.append(i)
-                matching_chunks.append(chunk)
-
-        if not matching_chunks:
+        With no query embedding (the structured stage of iter_query) the
+        semantic scores are zero and the ranking is lexical only.
+        """
+        with timer.stage("file_chunks"):
+            matching_indices = self._chunks_for_files(file_paths)
+        timer.size("file_chunks", len(matching_indices))
+        if not matching_indices:
             return []
 
-        matching_embeddings = self.embeddings[matching_indices]
-        semantic_scores = np.dot(matching_embeddings, query_embedding)
-
-        if query_text and self.bm25:
-            keyword_scores = self._keyword_search_subset(query_text, matching_indices)
-        else:
-            keyword_scores = np.zeros(len(matching_indices))
-
-        authority_scores = self._authority_boost(matching_chunks)
+        with timer.stage("semantic"):
+            if all_semantic_scores is not None:
+                semantic_scores = all_semantic_scores[matching_indices]
+            elif query_embedding is None:
+                semantic_scores = np.zeros(len(matching_indices))
+            else:
+                matching_embeddings = self.embeddings[matching_indices]
+                semantic_scores = np.dot(matching_embeddings, query_embedding)
 
-        if query_text:
-            final_scores = (
-                config.STRUCTURED_WITHIN_FILE_SEMANTIC_WEIGHT * semantic_scores +
-                config.STRUCTURED_WITHIN_FILE_KEYWORD_WEIGHT * keyword_scores +
-                config.STRUCTURED_WITHIN_FILE_AUTHORITY_WEIGHT * authority_scores
-            )
-        else:
-            final_scores = 0.8 * semantic_scores + 0.2 * authority_scores
+        with timer.stage("keyword"):
+            if query_text and self.bm25:
+                keyword_scores = self._keyword_search_subset(
+                    query_text, matching_indices, term_scores=term_scores
+                )
+            else:
+                keyword_scores = np.zeros(len(matching_indices))
 
-        sorted_indices = np.argsort(final_scores)[::-1][:top_k]
+            authority_scores = self._authority_boost(matching_indices)
 
-        results = []
-        for idx in sorted_indices:
-            result = {
-                "chunk": matching_chunks[idx],
-                "final_score": round(float(final_scores[idx]), 3),
-                "semantic_score": round(float(semantic_scores[idx]), 3),
-                "keyword_score": round(float(keyword_scores[idx]), 3) if query_text else 0.0,
-                "authority_score": round(float(authority_scores[idx]), 3),
-                "section_reference": matching_chunks[idx]["section_reference"],
-                "layer": "quick_reference"
-            }
-            results.append(result)
+        with timer.stage("scoring"):
+            if query_text:
+                final_scores = (
+                    config.STRUCTURED_WITHIN_FILE_SEMANTIC_WEIGHT * semantic_scores +
+                    config.STRUCTURED_WITHIN_FILE_KEYWORD_WEIGHT * keyword_scores +
+                    config.STRUCTURED_WITHIN_FILE_AUTHORITY_WEIGHT * authority_scores
+                )
+            else:
+                final_scores = 0.8 * semantic_scores + 0.2 * authority_scores
+
+            sorted_indices = np.argsort(final_scores)[::-1][:top_k]
+
+            results = []
+            for idx in sorted_indices:
+                result = {
+                    "chunk": self.store.chunk(matching_indices[idx]),
+                    "final_score": round(float(final_scores[idx]), 3),
+                    "semantic_score": round(float(semantic_scores[idx]), 3),
+                    "keyword_score": round(float(keyword_scores[idx]), 3) if query_text else 0.0,
+                    "authority_score": round(float(authority_scores[idx]), 3),
+                    "section_reference": self.chunks[matching_indices[idx]]["section_reference"],
+                    "layer": "quick_reference"
+                }
+                results.append(result)
+        timer.size("scoring", len(results))
 
         return results
 
@@ -434,38 +1220,36 @@ class RAGRetriever:
         return None
 
     def _apply_canonical_boost_subset(
-        self, authority_scores, canonical_file: str, chunks: List[Dict]
+        self, authority_scores, canonical_file: str, indices: List[int]
     ):
         """Apply canonical boost to a subset of chunks."""
-        boosted_scores = authority_scores.copy()
-
-        for i, chunk in enumerate(chunks):
-            chunk_file = chunk.get('source_file', '')
-            if canonical_file in chunk_file:
-                boosted_scores[i] *= config.CANONICAL_BOOST_MULTIPLIER
+        canonical_sources = [
+            self.source_ids[source] for source in self._sources_matching(canonical_file)
+        ]
+        is_canonical = np.isin(self.chunk_source_ids[indices], canonical_sources)
 
+        boosted_scores = authority_scores.copy()
+        boosted_scores[is_canonical] *= config.CANONICAL_BOOST_MULTIPLIER
         return boosted_scores
 
     def _boost_heading_matches(
-        self, chunks: List[Dict], query_keywords: set, keyword_scores
+        self, indices: List[int], query_keywords: set, keyword_scores
     ):
         """Boost keyword scores when keywords appear in section headings."""
-        boosted_scores = keyword_scores.copy()
-
-        for i, chunk in enumerate(chunks):
-            heading = chunk.get('heading_text', '').lower()
-            normalized_heading = re.sub(r'[[\]()]', '', heading)
-
-            heading_keyword_count = 0
-            for kw in query_keywords:
-                if kw in heading or kw in normalized_heading:
-                    heading_keyword_count += 1
-
-            if heading_keyword_count > 0:
-                boost_multiplier = min(2.0, 1.0 + (heading_keyword_count * 0.5))
-                boosted_scores[i] *= boost_multiplier
+        if self.precision_index and self.precision_index.supports(query_keywords):
+            hits = self.precision_index.heading_hits(query_keywords, indices)
+        else:
+            hits = np.zeros(len(indices), dtype=np.int32)
+            for i, chunk_idx in enumerate(indices):
+                heading = self.chunks[chunk_idx].get('heading_text', '').lower()
+                normalized_heading = re.sub(r'[\[\]()]', '', heading)
+                hits[i] = sum(
+                    1 for kw in query_keywords
+                    if kw in heading or kw in normalized_heading
+                )
 
-        return boosted_scores
+        multipliers = np.where(hits > 0, np.minimum(2.0, 1.0 + hits * 0.5), 1.0)
+        return keyword_scores * multipliers
 
     def _rank_and_format_subset(
         self, final_scores, semantic_scores, keyword_scores,
@@ -486,7 +1270,7 @@ class RAGRetriever:
         results = []
         for subset_idx in top_subset_indices:
             result = {
-                "chunk": chunks[subset_idx],
+                "chunk": self.store.chunk(original_indices[subset_idx]),
                 "final_score": round(float(final_scores[subset_idx]), 3),
                 "semantic_score": round(float(semantic_scores[subset_idx]), 3),
                 "keyword_score": round(float(keyword_scores[subset_idx]), 3),
@@ -500,52 +1284,43 @@ class RAGRetriever:
         return results
 
     def _suppress_routing_docs(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Suppress routing docs if they reference files already in the result set."""
+        """Suppress routing docs if they reference files already in the result set.
+
+        Routing targets are extracted at index time (chunk["routing_target"]),
+        so this is a set lookup against the result files' names.
+        """
         if not config.ENABLE_ROUTING_SUPPRESSION:
             return results
 
-        result_files = set()
-        for r in results:
-            source_file = r['chunk'].get('source_file', '')
-            result_files.add(source_file)
+        result_files = {
+            normalize_source_path(r['chunk'].get('source_file', '')).rsplit('/', 1)[-1]
+            for r in results
+        }
 
         filtered_results = []
-
         for r in results:
             chunk = r['chunk']
-            content = chunk.get('content', '')
-
-            is_routing = False
-            referenced_file = None
-
-            for pattern in config.ROUTING_PATTERNS:
-                match = re.search(pattern, content)
-                if match:
-                    referenced_file = match.group(1)
-                    is_routing = True
-                    break
-
-            if is_routing and referenced_file:
-                for other_r in results:
-                    other_file = other_r['chunk'].get('source_file', '')
-                    if referenced_file in other_file:
-                        break
-                else:
-                    filtered_results.append(r)
+            if 'routing_target' in chunk:
+                referenced_file = chunk['routing_target']
             else:
-                filtered_results.append(r)
+                # Index built before routing targets were stored
+                referenced_file = extract_routing_target(chunk.get('content', ''))
+
+            if referenced_file and referenced_file in result_files:
+                continue
+            filtered_results.append(r)
 
         return filtered_results
 
     def _top_authoritative(self, top_k: int) -> List[Dict[str, Any]]:
         """Return top-k most authoritative docs (for empty queries)."""
-        authority_scores = self._authority_boost(self.chunks)
+        authority_scores = self._authority_vector()
         top_indices = np.argsort(authority_scores)[::-1][:top_k]
 
         results = []
         for idx in top_indices:
             result = {
-                "chunk": self.chunks[idx],
+                "chunk": self.store.chunk(idx),
                 "final_score": round(float(authority_scores[idx]), 3),
                 "semantic_score": 0.0,
                 "keyword_score": 0.0,
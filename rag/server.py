@@ -0,0 +1,254 @@
+"""Long-lived query daemon that keeps a RAGRetriever warm.
+
+Loads the index and embedding model once, then answers queries over
+localhost HTTP so short-lived CLI calls skip the startup cost. Each request
+is handled on its own thread against the shared retriever.
+
+Usage:
+    python -m rag serve [--host 127.0.0.1] [--port 8765] [--workers N]
+
+With --workers N (POSIX only), the parent loads the index and model, then
+forks N workers that share its listening socket. The index arrays are
+memory-mapped files and the model and metadata are inherited
+copy-on-write, so workers start in milliseconds and add little memory
+beyond their own query-time allocations.
+
+Endpoints:
+    GET  /health   -> {"status": "ok", "chunks": N, "embedding_cache": {...},
+                       "result_cache": {...}, "query_timings": {...}}
+    POST /query    <- {"query": "...", "top_k": 5, "filter_status": [...],
+                       "enable_precision_filter": true}
+                   -> {"results": [...]}
+"""
+import argparse
+import gc
+import json
+import os
+import signal
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+from . import config
+from .cache import flush_stores
+from .client import DAEMON_SERVER_NAME
+from .query import get_retriever
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """HTTP handler that forwards requests to the shared retriever."""
+
+    server_version = f"{DAEMON_SERVER_NAME}/1.0"
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+
+        retriever = get_retriever()
+        self._send_json(200, {
+            "status": "ok",
+            "chunks": len(retriever.chunks),
+            "embedding_cache": retriever.embedding_cache.stats(),
+            "result_cache": retriever.result_cache.stats() if retriever.result_cache else None,
+            "query_timings": retriever.stats() if config.ENABLE_QUERY_TIMINGS else None
+        })
+
+    def do_POST(self):
+        if self.path != "/query":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid request body: {e}"})
+            return
+
+        query_text = request.get("query")
+        if not isinstance(query_text, str):
+            self._send_json(400, {"error": "Missing 'query' string"})
+            return
+
+        try:
+            results = get_retriever().query(
+                query_text,
+                top_k=int(request.get("top_k", config.DEFAULT_TOP_K)),
+                filter_status=request.get("filter_status"),
+                enable_precision_filter=bool(request.get("enable_precision_filter", True))
+            )
+        except Exception as e:
+            self._send_json(500, {"error": f"Error during query: {e}"})
+            return
+
+        self._send_json(200, {"results": results})
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep the daemon quiet unless SERVER_LOG_REQUESTS is enabled."""
+        if config.SERVER_LOG_REQUESTS:
+            super().log_message(format, *args)
+
+
+def serve(
+    host: str = config.SERVER_HOST,
+    port: int = config.SERVER_PORT,
+    workers: int = config.SERVER_WORKERS
+):
+    """Load the index once and serve queries until interrupted.
+
+    Queries go through the shared retriever, so a rebuilt index is picked
+    up on the next request without restarting the daemon (each worker
+    reloads its own copy in that case).
+
+    Args:
+        host: Interface to bind
+        port: Port to bind
+        workers: Worker processes forked after loading (1 = serve in-process)
+    """
+    if workers > 1 and not hasattr(os, "fork"):
+        print("Warning: --workers needs os.fork(); serving from a single process")
+        workers = 1
+
+    # The model is loaded lazily; a long-lived daemon loads it up front so
+    # the first uncached client query is not the slow one. With workers,
+    # only the weights load here: an encode would start torch/OpenMP thread
+    # pools, which do not survive fork(), so each worker warms up itself
+    retriever = get_retriever()
+    if workers > 1:
+        retriever.model  # Property access loads the weights
+    else:
+        retriever.model.encode(["warmup"])
+
+    try:
+        server = ThreadingHTTPServer((host, port), QueryHandler)
+    except OSError as e:
+        print(f"Error: Could not bind {host}:{port}: {e}")
+        sys.exit(1)
+
+    print(f"RAG query daemon listening on http://{host}:{port}")
+    if workers > 1:
+        _serve_forked(server, workers)
+        return
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+
+
+def _serve_forked(server: ThreadingHTTPServer, workers: int):
+    """Fork workers that accept on the parent's socket; restart any that die."""
+    # Move everything loaded so far out of the collector's reach: a GC pass
+    # in a worker would otherwise write to (and so copy) every inherited page
+    # holding a tracked object
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(server, workers)
+        children[pid] = slot
+
+    # SIGTERM (e.g. from a process manager) shuts down like Ctrl-C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    for slot in range(workers):
+        spawn(slot)
+    print(f"  Forked {workers} workers: {', '.join(str(pid) for pid in children)}")
+
+    try:
+        while children:
+            pid, status = os.wait()
+            slot = children.pop(pid, None)
+            if slot is not None:
+                print(f"Worker {pid} exited (status {status}); restarting")
+                spawn(slot)
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        # A second Ctrl-C or SIGTERM must not interrupt the reap below
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        server.server_close()
+
+
+def _run_worker(server: ThreadingHTTPServer, workers: int):
+    """Worker body: serve on the inherited socket until signalled. Never returns."""
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    # Split the cores between workers instead of each using all of them
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+
+    status = 0
+    try:
+        get_retriever().model.encode(["warmup"])
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"Worker {os.getpid()} failed: {e}")
+        status = 1
+    finally:
+        # os._exit() skips atexit, so commit queued cache writes here
+        flush_stores()
+        sys.stdout.flush()
+        os._exit(status)
+
+
+def main(argv=None):
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m rag serve",
+        description="Serve RAG queries from a persistent process"
+    )
+    parser.add_argument(
+        "--host",
+        default=config.SERVER_HOST,
+        help=f"Interface to bind (default: {config.SERVER_HOST})"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=config.SERVER_PORT,
+        help=f"Port to bind (default: {config.SERVER_PORT})"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.SERVER_WORKERS,
+        help=f"Worker processes sharing the loaded index (default: {config.SERVER_WORKERS})"
+    )
+
+    args = parser.parse_args(argv)
+
+    serve(host=args.host, port=args.port, workers=max(1, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Sharded indexes: independent per-collection indexes queried together.
+
+Each shard in config.SHARDS is a complete index under SHARDS_DIR/<name>,
+built with `python -m rag.indexer --shard NAME`. Rebuilding one shard
+leaves the others (and their embeddings) untouched.
+
+ShardedRetriever embeds the query once, runs the retrieval pipeline on
+every shard in a thread pool (the NumPy scoring releases the GIL), and
+merges the per-shard top-k by final score.
+"""
+import asyncio
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from . import config
+from .retriever import (
+    RAGRetriever,
+    get_query_embedding_cache,
+    get_query_executor,
+    get_result_cache,
+    run_stages
+)
+from .timings import StageStats, new_timer
+
+
+def shard_dir(name: str) -> Path:
+    """Output directory for a shard's index."""
+    return config.SHARDS_DIR / name
+
+
+def shard_files(name: str) -> Tuple[Path, Path]:
+    """(index_file, embeddings_file) for a shard."""
+    directory = shard_dir(name)
+    return directory / config.INDEX_FILE.name, directory / config.EMBEDDINGS_FILE.name
+
+
+def in_shard(rel_path: str, name: str) -> bool:
+    """True if a repo-relative path belongs to the named shard."""
+    rel_path = rel_path.replace("\\", "/")
+    return any(
+        rel_path.startswith(prefix.rstrip("/") + "/") or rel_path == prefix
+        for prefix in config.SHARDS[name]
+    )
+
+
+class ShardedRetriever:
+    """
+    Coordinator over one RAGRetriever per shard.
+
+    Exposes the same query interface as RAGRetriever. Scores are computed
+    within each shard (BM25 statistics and score normalization are
+    per-shard), so merged rankings can differ slightly from one combined
+    index over the same docs.
+    """
+
+    def __init__(self, shard_names: Optional[List[str]] = None):
+        names = list(shard_names or config.SHARDS)
+        if not names:
+            print("Error: No shards configured (config.SHARDS is empty)")
+            sys.exit(1)
+
+        missing = [name for name in names if not shard_files(name)[0].exists()]
+        if missing:
+            print(f"Error: Shard index not found: {', '.join(missing)}")
+            for name in missing:
+                print(f"Build shard with: python -m rag.indexer --shard {name}")
+            sys.exit(1)
+
+        # Shards share the process-wide model (get_encoder)
+        self.shards: Dict[str, RAGRetriever] = {}
+        for name in names:
+            print(f"Shard '{name}':")
+            index_file, embeddings_file = shard_files(name)
+            self.shards[name] = RAGRetriever(index_file, embeddings_file)
+
+        self.embedding_cache = get_query_embedding_cache()
+        self.result_cache = get_result_cache()
+        self.query_timings = StageStats()
+        self.generation = "+".join(shard.generation for shard in self.shards.values())
+        self.chunks = [chunk for shard in self.shards.values() for chunk in shard.chunks]
+        self._primary = next(iter(self.shards.values()))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._executor_lock = threading.Lock()
+
+        print(f"  Loaded {len(self.shards)} shards ({len(self.chunks)} chunks)")
+
+    @property
+    def model(self):
+        """Shared embedding model, loaded on first use."""
+        return self._primary.model
+
+    def query(
+        self,
+        query_text: str,
+        top_k: int = config.DEFAULT_TOP_K,
+        filter_status: Optional[List[str]] = None,
+        enable_precision_filter: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve top-k chunks across all shards.
+
+        Args:
+            query_text: Natural language query
+            top_k: Number of results to return
+            filter_status: Optional filter ["AUTHORITATIVE", "STABLE"]
+            enable_precision_filter: Enable Phase A precision pre-filter
+
+        Returns:
+            List of chunks with scores (tagged with "shard"), sorted by final_score desc
+        """
+        if not query_text:
+            return self._top_authoritative(top_k)
+
+        timer = new_timer()
+        with timer.stage("total"):
+            key = self._result_key(query_text, top_k, filter_status, enable_precision_filter)
+            results = None
+            if key is not None:
+                with timer.stage("result_cache"):
+                    results = self._cached_results(key)
+            if results is None:
+                with timer.stage("embed"):
+                    query_embedding = self._embed_query(query_text)
+                with timer.stage("shards"):
+                    results = self._query(
+                        query_text, top_k, filter_status, enable_precision_filter,
+                        query_embedding
+                    )
+                self._store_results(key, results)
+        self.query_timings.record(timer)
+        return results
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Rolling latency percentiles per stage (see RAGRetriever.stats).
+
+        Coordinator stages (embed, the parallel "shards" stage, total) come
+        first, then each shard's pipeline stages as "NAME:stage".
+        """
+        stats = self.query_timings.summary()
+        for name, shard in self.shards.items():
+            stats.update(shard.query_timings.summary(prefix=f"{name}:"))
+        return stats
+
+    def iter_query(
+        self,
+        query_text: str,
+        top_k: int = config.DEFAULT_TOP_K,
+        filter_status: Optional[List[str]] = None,
+        enable_precision_filter: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        query() across all shards, yielding provisional rankings as they arrive.
+
+        Each shard's provisional stage (see RAGRetriever.iter_query) is
+        yielded as soon as that shard has it, tagged with "shard"; the
+        merged final ranking, equal to query(), comes last.
+        """
+        key = self._result_key(query_text, top_k, filter_status, enable_precision_filter)
+        cached = self._cached_results(key)
+        if cached is not None:
+            yield {"stage": "final", "results": cached}
+            return
+
+        stages: queue.Queue = queue.Queue()
+
+        def drive(name, shard):
+            try:
+                for stage, results in shard._query_stages(
+                    query_text, top_k, filter_status, enable_precision_filter,
+                    term_scores={}, provisional=True
+                ):
+                    stages.put((name, stage, results, None))
+            except BaseException as e:
+                stages.put((name, "final", None, e))
+
+        pool = self._pool()
+        for name, shard in self.shards.items():
+            pool.submit(drive, name, shard)
+
+        finals: Dict[str, List[Dict[str, Any]]] = {}
+        while len(finals) < len(self.shards):
+            name, stage, results, error = stages.get()
+            if error is not None:
+                raise error
+            if stage == "final":
+                finals[name] = results
+                continue
+            for result in results:
+                result["shard"] = name
+            yield {"stage": stage, "shard": name, "results": results}
+
+        # Merge in shard order so ties break as in query()
+        results = self._merge([finals[name] for name in self.shards], top_k)
+        self._store_results(key, results)
+        yield {"stage": "final", "results": results}
+
+    async def aquery(
+        self,
+        query_text: str,
+        top_k: int = config.DEFAULT_TOP_K,
+        filter_status: Optional[List[str]] = None,
+        enable_precision_filter: bool = True,
+        executor: Optional[Executor] = None
+    ) -> List[Dict[str, Any]]:
+        """Async query() across all shards (see RAGRetriever.aquery)."""
+        loop = asyncio.get_running_loop()
+        if not query_text:
+            return await loop.run_in_executor(
+                executor or get_query_executor(), self._top_authoritative, top_k
+            )
+
+        timer = new_timer()
+        key = self._result_key(query_text, top_k, filter_status, enable_precision_filter)
+
+        def lookup():
+            with timer.stage("result_cache"):
+                return self._cached_results(key)
+
+        def embed():
+            with timer.stage("embed"):
+                return self._embed_query(query_text)
+
+        def rank(query_embedding):
+            with timer.stage("shards"):
+                results = self._query(
+                    query_text, top_k, filter_status, enable_precision_filter, query_embedding
+                )
+            self._store_results(key, results)
+            return results
+
+        with timer.stage("total"):
+            results = None
+            if key is not None:
+                results = await loop.run_in_executor(executor or get_query_executor(), lookup)
+            if results is None:
+                results = await run_stages(executor, embed, rank)
+        self.query_timings.record(timer)
+        return results
+
+    def query_batch(
+        self,
+        query_texts: List[str],
+        top_k: int = config.DEFAULT_TOP_K,
+        filter_status: Optional[List[str]] = None,
+        enable_precision_filter: bool = True
+    ) -> List[List[Dict[str, Any]]]:
+        """Retrieve top-k chunks for many queries (embedded in one model call)."""
+        unique_texts = list(dict.fromkeys(q for q in query_texts if q))
+        if unique_texts:
+            # Warms the shared embedding cache for the per-query calls below
+            self._primary._embed_queries(unique_texts)
+
+        return [
+            self.query(query_text, top_k, filter_status, enable_precision_filter)
+            for query_text in query_texts
+        ]
+
+    def get_section(self, reference: str) -> Optional[Dict[str, Any]]:
+        """Resolve a section reference in whichever shard holds it."""
+        for shard in self.shards.values():
+            chunk = shard.get_section(reference)
+            if chunk is not None:
+                return chunk
+        return None
+
+    # Result cache helpers only use self.result_cache and self.generation
+    _result_key = RAGRetriever._result_key
+    _cached_results = RAGRetriever._cached_results
+    _store_results = RAGRetriever._store_results
+
+    def _embed_query(self, query_text: str):
+        return self._primary._embed_query(query_text)
+
+    def _query(
+        self,
+        query_text: str,
+        top_k: int,
+        filter_status: Optional[List[str]],
+        enable_precision_filter: bool,
+        query_embedding
+    ) -> List[Dict[str, Any]]:
+        """Run the pipeline on every shard with a precomputed query embedding."""
+        def run(shard):
+            timer = new_timer()
+            results = shard._query(
+                query_text, top_k, filter_status, enable_precision_filter,
+                query_embedding=query_embedding, timer=timer
+            )
+            shard.query_timings.record(timer)
+            return results
+
+        return self._gather(run, top_k)
+
+    def _top_authoritative(self, top_k: int) -> List[Dict[str, Any]]:
+        return self._gather(lambda shard: shard._top_authoritative(top_k), top_k)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """Shard thread pool (recreated in a forked child, where its threads are gone)."""
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, min(config.SHARD_MAX_WORKERS, len(self.shards))),
+                    thread_name_prefix="rag-shard"
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _gather(self, run, top_k: int) -> List[Dict[str, Any]]:
+        """Run `run(shard)` on every shard in parallel and merge the top-k."""
+        pool = self._pool()
+        futures = [pool.submit(run, shard) for shard in self.shards.values()]
+        return self._merge([future.result() for future in futures], top_k)
+
+    def _merge(self, shard_results: List[List[Dict[str, Any]]], top_k: int) -> List[Dict[str, Any]]:
+        """Tag per-shard results (in self.shards order) and merge the top-k."""
+        results = []
+        for name, shard_result in zip(self.shards, shard_results):
+            for result in shard_result:
+                result["shard"] = name
+                results.append(result)
+
+        # Stable sort: ties keep shard order, as in config.SHARDS
+        results.sort(key=lambda r: r["final_score"], reverse=True)
+        return self._primary._suppress_routing_docs(results[:top_k])
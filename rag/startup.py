@@ -0,0 +1,49 @@
+"""Startup timing report: where the fixed cost of a query process goes.
+
+Phases are recorded process-wide (import of the rag modules, each index
+load step, the embedding model load) and printed by
+`python -m rag.query ... --startup-timings`.
+"""
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+# Set when the rag package is first imported
+PROCESS_START = time.perf_counter()
+
+_phases: Dict[str, float] = {}
+
+
+def record(name: str, seconds: float):
+    """Add `seconds` to phase `name` (phases repeat, e.g. once per shard)."""
+    _phases[name] = _phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def phase(name: str):
+    """Time the enclosed block as phase `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def report() -> Dict[str, float]:
+    """Recorded phases in milliseconds, in the order they first ran."""
+    return {name: round(seconds * 1000, 1) for name, seconds in _phases.items()}
+
+
+def print_report(file=sys.stderr):
+    """Print the recorded phases and their total."""
+    timings = report()
+    if not timings:
+        print("Startup timings: nothing recorded", file=file)
+        return
+
+    width = max(len(name) for name in timings)
+    print("Startup timings (ms):", file=file)
+    for name, ms in timings.items():
+        print(f"  {name:<{width}}  {ms:>9.1f}", file=file)
+    print(f"  {'total':<{width}}  {sum(timings.values()):>9.1f}", file=file)
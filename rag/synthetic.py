@@ -0,0 +1,191 @@
+"""Synthetic markdown corpora for benchmarks.
+
+generate_corpus() writes a docs tree shaped like the real one: files with
+a metadata header and H2/H3 sections long enough to become separate chunks,
+plus a CORE_DOCS_INDEX.md with a document table, a Quick Reference table
+and a Canonical Sources table. Text is built from a fixed pseudo-word
+vocabulary with a Zipf-like frequency distribution and per-file topic
+words, so BM25, the precision filter and structured lookup all have
+something to match. Output is deterministic for a given seed.
+"""
+import itertools
+import math
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+from . import config
+
+_SYLLABLES = [
+    "ka", "lo", "mi", "ren", "tu", "sa", "vel", "dor", "an", "pe",
+    "qui", "zo", "bra", "nix", "tal", "or", "shi", "gem", "fa", "lun",
+]
+_STATUSES = ["AUTHORITATIVE", "STABLE", "unmarked"]
+_AREAS = ["methodology", "technical", "theory", "operations"]
+_QR_VERBS = ["configure", "debug", "deploy", "review", "measure"]
+
+# Words per line and lines per section (sections must reach
+# MIN_CHUNK_LINES or the chunker merges them into their parent)
+_WORDS_PER_LINE = (8, 14)
+
+
+def _vocabulary(rng: random.Random, size: int) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def _line(rng: random.Random, vocabulary: List[str], cum_weights: List[float], topic: List[str]) -> str:
+    n_words = rng.randint(*_WORDS_PER_LINE)
+    words = rng.choices(vocabulary, cum_weights=cum_weights, k=n_words)
+    # Roughly one line in three mentions the file's topic
+    if rng.random() < 0.35:
+        words[rng.randrange(n_words)] = rng.choice(topic)
+    return " ".join(words).capitalize() + "."
+
+
+def _section(
+    rng: random.Random, vocabulary: List[str], cum_weights: List[float],
+    topic: List[str], n_lines: int
+) -> List[str]:
+    lines = []
+    for i in range(n_lines):
+        if i % 9 == 4:
+            lines.append(f"- {_line(rng, vocabulary, cum_weights, topic)}")
+        else:
+            lines.append(_line(rng, vocabulary, cum_weights, topic))
+    if rng.random() < 0.2:
+        lines += ["", "```bash", f"run {' '.join(topic)} --check", "```"]
+    return lines
+
+
+def generate_corpus(
+    root: Path,
+    target_chunks: int,
+    sections_per_file: int = 12,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Write a synthetic docs tree under root/config.DOCS_ROOT.
+
+    Each file yields one header chunk plus one chunk per H2/H3 section, so
+    the corpus has about target_chunks chunks.
+
+    Args:
+        root: Directory to write into (becomes the working directory for indexing)
+        target_chunks: Approximate number of chunks the indexer will produce
+        sections_per_file: H2/H3 sections per file
+        seed: Random seed
+
+    Returns:
+        {"files": [...], "headings": [...], "qr_questions": [...],
+         "canonical_concepts": [...]} with repo-relative paths
+    """
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(rng, 4000)
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+    # Topic words come from the rarer half so they discriminate
+    topic_pool = vocabulary[len(vocabulary) // 2:]
+
+    n_files = max(1, math.ceil(target_chunks / (sections_per_file + 1)))
+    section_lines = config.MIN_CHUNK_LINES + 2
+
+    files = []
+    headings = []
+    for file_number in range(n_files):
+        topic = rng.sample(topic_pool, 2)
+        area = _AREAS[file_number % len(_AREAS)]
+        name = f"{topic[0].upper()}_{topic[1].upper()}_{file_number:06d}.md"
+        rel_path = f"{config.DOCS_ROOT.as_posix()}/{area}/{name}"
+        status = rng.choice(_STATUSES)
+
+        lines = [
+            f"# {topic[0].title()} {topic[1].title()} Guide",
+            "",
+            "**Version:** 1.0",
+            f"**Status:** {status}",
+            f"**Last Updated:** 2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            f"**Purpose:** How {topic[0]} {topic[1]} works",
+            "",
+        ]
+        h2_number = 0
+        for section_number in range(sections_per_file):
+            heading_words = [rng.choice(topic)] + rng.choices(vocabulary[:1000], k=2)
+            heading = " ".join(word.title() for word in heading_words)
+            # Every third section is an H3 under the preceding H2
+            if section_number % 3 == 2:
+                lines.append(f"### {h2_number}.1 {heading}")
+            else:
+                h2_number += 1
+                lines.append(f"## {h2_number}. {heading}")
+            lines.append("")
+            lines += _section(rng, vocabulary, cum_weights, topic, section_lines)
+            lines.append("")
+            headings.append(heading)
+
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        files.append({"path": rel_path, "status": status, "topic": topic})
+
+    # Structured lookup targets: separate files for the two tables, so a
+    # canonical-concept query does not also match a Quick Reference question
+    sampled = rng.sample(files, min(len(files), 40))
+    qr_files = sampled[:20]
+    canonical_files = sampled[20:] or sampled
+    qr_questions = [
+        f"How do I {_QR_VERBS[i % len(_QR_VERBS)]} {f['topic'][0]} {f['topic'][1]}?"
+        for i, f in enumerate(qr_files)
+    ]
+    canonical_concepts = [f"{f['topic'][0]} {f['topic'][1]} model" for f in canonical_files]
+
+    # Two-column lookup tables: parse_quick_reference_table() and
+    # parse_canonical_sources_table() read cells in (question, source) pairs
+    index_lines = [
+        "# Core Documentation Index",
+        "",
+        "Synthetic corpus for benchmarks.",
+        "",
+        "## Quick Reference",
+        "",
+        "| Question | Source |",
+        "|---|---|",
+    ]
+    index_lines += [
+        f"| {question} | `{f['path']}` |"
+        for question, f in zip(qr_questions, qr_files)
+    ]
+    index_lines += [
+        "",
+        "## Canonical Sources",
+        "",
+        "| Concept | Canonical Source |",
+        "|---|---|",
+    ]
+    index_lines += [
+        f"| {concept} | `{f['path']}` |"
+        for concept, f in zip(canonical_concepts, canonical_files)
+    ]
+    index_lines += [
+        "",
+        "## Documents",
+        "",
+        "| File | Purpose | Status | Verified |",
+        "|---|---|---|---|",
+    ]
+    index_lines += [
+        f"| `{f['path']}` | {f['topic'][0]} {f['topic'][1]} v1.0 | **{f['status']}** | 2026-01-15 |"
+        for f in files if f["status"] != "unmarked"
+    ]
+
+    index_path = root / config.CORE_DOC_INDEX
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    index_path.write_text("\n".join(index_lines) + "\n", encoding="utf-8")
+
+    return {
+        "files": [f["path"] for f in files],
+        "headings": headings,
+        "qr_questions": qr_questions,
+        "canonical_concepts": canonical_concepts,
+    }
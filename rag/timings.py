@@ -0,0 +1,164 @@
+"""Per-stage query latency: where the time of each query goes.
+
+When config.ENABLE_QUERY_TIMINGS is set, every query records how long each
+pipeline stage took (structured lookup, embedding, precision filter,
+keyword scoring, ...) and how many candidates were left after it. The
+retriever keeps the last QUERY_TIMINGS_WINDOW queries and reports rolling
+p50/p95/p99 per stage from stats(); `python -m rag.query ... --timings`
+prints the same breakdown.
+
+With timings disabled, queries get NULL_TIMER, whose methods do nothing.
+"""
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from . import config
+
+
+class _Stage:
+    """Context manager adding the elapsed time of its block to a timer."""
+
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer: "StageTimer", name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = self.timer.seconds
+        seconds[self.name] = seconds.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class StageTimer:
+    """Stage durations and candidate-set sizes for one query."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.sizes: Dict[str, int] = {}
+
+    def stage(self, name: str) -> _Stage:
+        """Time the enclosed block as stage `name` (repeats add up)."""
+        return _Stage(self, name)
+
+    def size(self, name: str, n: int):
+        """Record the candidate-set size after stage `name`."""
+        self.sizes[name] = n
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _NullTimer:
+    """Timer used when timings are disabled: records nothing."""
+
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+    def size(self, name: str, n: int):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+def new_timer():
+    """A StageTimer if config.ENABLE_QUERY_TIMINGS is set, else NULL_TIMER."""
+    return StageTimer() if config.ENABLE_QUERY_TIMINGS else NULL_TIMER
+
+
+class StageStats:
+    """Rolling per-stage latency and candidate counts over recent queries.
+
+    record() may be called from several query threads at once.
+    """
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = window or config.QUERY_TIMINGS_WINDOW
+        self._seconds: Dict[str, Deque[float]] = {}
+        self._sizes: Dict[str, Deque[int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timer):
+        """Add one query's timer (NULL_TIMER is ignored)."""
+        if timer is NULL_TIMER:
+            return
+        with self._lock:
+            for name, seconds in timer.seconds.items():
+                self._window(self._seconds, name).append(seconds)
+            for name, n in timer.sizes.items():
+                self._window(self._sizes, name).append(n)
+
+    def _window(self, series: Dict[str, deque], name: str) -> deque:
+        if name not in series:
+            series[name] = deque(maxlen=self.window)
+        return series[name]
+
+    def summary(self, prefix: str = "") -> Dict[str, Dict[str, Any]]:
+        """
+        Percentiles per stage, in the order stages first ran.
+
+        Returns:
+            {stage: {"count", "p50_ms", "p95_ms", "p99_ms"[, "candidates_p50"]}}
+        """
+        import numpy as np
+
+        with self._lock:
+            seconds = {name: list(values) for name, values in self._seconds.items()}
+            sizes = {name: list(values) for name, values in self._sizes.items()}
+
+        summary = {}
+        for name, values in seconds.items():
+            p50, p95, p99 = np.percentile(np.array(values) * 1000, [50, 95, 99])
+            row: Dict[str, Any] = {
+                "count": len(values),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+            }
+            if name in sizes:
+                row["candidates_p50"] = int(np.median(sizes[name]))
+            summary[prefix + name] = row
+        return summary
+
+    def reset(self):
+        """Forget all recorded queries."""
+        with self._lock:
+            self._seconds.clear()
+            self._sizes.clear()
+
+
+def print_stats(stats: Dict[str, Dict[str, Any]], file=sys.stderr):
+    """Print a stats() breakdown as a table."""
+    if not stats:
+        print("Query timings: nothing recorded", file=file)
+        return
+
+    width = max(len(name) for name in stats)
+    print("Query timings (ms):", file=file)
+    print(f"  {'stage':<{width}}  {'count':>6}  {'p50':>9}  {'p95':>9}  {'p99':>9}  candidates",
+          file=file)
+    for name, row in stats.items():
+        line = (
+            f"  {name:<{width}}  {row['count']:>6}  {row['p50_ms']:>9.3f}  "
+            f"{row['p95_ms']:>9.3f}  {row['p99_ms']:>9.3f}"
+        )
+        if "candidates_p50" in row:
+            line += f"  {row['candidates_p50']}"
+        print(line, file=file)